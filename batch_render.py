@@ -0,0 +1,127 @@
+"""
+batch_render.py — 出勤情報ストーリー画像の一括生成
+
+エントリをチャンクに分けてプロセスプールで描画する。
+各ワーカーは起動時にフォントと固定レイヤー（image_schedule のベース画像）を1回だけ読み込み、
+PNGエンコード・ファイル書き込みはワーカー内の書き込みスレッドで次の画像の描画と並行して行う。
+結果は入力順に返すため、進捗表示の順序は直列実行と同じになる。
+"""
+
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from fonts import font_cache_stats
+from image_schedule import render_schedule_image, warm_template
+from metrics import profiler
+from output_manifest import atomic_write
+
+# 1ワーカーあたりのチャンク数の目安（小さすぎると負荷が偏り、大きすぎると通信が増える）
+CHUNKS_PER_WORKER = 4
+
+# (エントリ, 出力パス)
+RenderTask = Tuple[Dict[str, str], str]
+# 内訳名 → (実時間, CPU時間)。metrics.profiler に渡す
+Phases = Dict[str, Tuple[float, float]]
+
+# 直近の render_schedule_batch() のフォントキャッシュ統計（全ワーカーの合計）
+font_stats: Dict[str, int] = {}
+
+
+def _init_worker() -> None:
+    """ワーカー起動時にベース画像（とそのフォント）を読み込んでおく。"""
+    warm_template()
+
+
+def _timed(func: Callable[..., Any], *args: Any) -> Tuple[Any, Tuple[float, float]]:
+    wall, cpu = time.perf_counter(), time.thread_time()
+    result = func(*args)
+    return result, (time.perf_counter() - wall, time.thread_time() - cpu)
+
+
+def _write_bytes(data: memoryview, out_path: str) -> None:
+    with atomic_write(out_path) as f:
+        f.write(data)
+
+
+def _save_png(img, out_path: str) -> Phases:
+    """PNGエンコードとファイル書き込みを分けて行い、それぞれの時間を返す。"""
+    buffer = io.BytesIO()
+    _, encode = _timed(img.save, buffer, "PNG")
+    _, write = _timed(_write_bytes, buffer.getbuffer(), out_path)
+    return {"encode": encode, "write": write}
+
+
+def _record(out_path: str, phases: Phases) -> None:
+    profiler.record_output(
+        "schedule",
+        out_path,
+        sum(wall for wall, _ in phases.values()),
+        sum(cpu for _, cpu in phases.values()),
+        phases,
+    )
+
+
+def _render_chunk(tasks: List[RenderTask]) -> Tuple[List[Tuple[str, Phases]], int, Dict[str, int]]:
+    """チャンク内の画像を描画・保存する（ワーカープロセスで実行）。
+
+    描画はこのスレッド、PNGエンコードと書き込みは書き込みスレッドで行う。
+    Returns:
+        ((出力パス, 内訳の時間) のリスト, ワーカーPID, ワーカーのフォントキャッシュ統計)
+    """
+    renders = []
+    with ThreadPoolExecutor(max_workers=1) as writer:
+        pending = []
+        for entry, out_path in tasks:
+            img, render = _timed(render_schedule_image, entry)
+            renders.append(render)
+            pending.append(writer.submit(_save_png, img, out_path))
+        results = []
+        for (_, out_path), render, future in zip(tasks, renders, pending):
+            phases = future.result()
+            phases["render"] = render
+            results.append((out_path, phases))
+    return results, os.getpid(), font_cache_stats()
+
+
+def render_schedule_batch(tasks: List[RenderTask], jobs: int = 1) -> Iterator[str]:
+    """出勤情報ストーリー画像をまとめて生成し、完了した出力パスを入力順に返す。
+
+    描画・PNGエンコード・書き込みの時間は metrics.profiler（--profile 時のみ有効）に記録する。
+
+    Args:
+        tasks: (エントリ, 出力パス) のリスト
+        jobs: ワーカープロセス数。1以下ならプロセスプールを使わず直列に生成する
+    """
+    font_stats.clear()
+    if jobs <= 1 or len(tasks) <= 1:
+        for entry, out_path in tasks:
+            img, render = _timed(render_schedule_image, entry)
+            phases = _save_png(img, out_path)
+            phases["render"] = render
+            _record(out_path, phases)
+            yield out_path
+        font_stats.update(font_cache_stats())
+        return
+
+    chunk_size = max(1, -(-len(tasks) // (jobs * CHUNKS_PER_WORKER)))
+    chunks = [tasks[i : i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+    worker_stats: Dict[int, Dict[str, int]] = {}
+    # --type all などでは他の生成タイプのスレッドと並行して呼ばれるため、fork ではなく spawn で
+    # ワーカーを起動する（fork すると他スレッドが保持中のロックを子プロセスが引き継いで止まることがある）
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=jobs, mp_context=context, initializer=_init_worker
+    ) as pool:
+        for results, pid, stats in pool.map(_render_chunk, chunks):
+            worker_stats[pid] = stats
+            for out_path, phases in results:
+                _record(out_path, phases)
+                yield out_path
+
+    for stats in worker_stats.values():
+        for name, value in stats.items():
+            font_stats[name] = font_stats.get(name, 0) + value
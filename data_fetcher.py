@@ -2,18 +2,33 @@
 data_fetcher.py — Google Sheets からDrシフトデータを取得するモジュール
 """
 
+import calendar
+import json
 import os
+import re
 from datetime import date, datetime
-from typing import Any, Dict, List, Optional
+from operator import itemgetter
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 
 import gspread
 from google.oauth2.service_account import Credentials
+from gspread.urls import DRIVE_FILES_API_V3_URL
+from gspread.utils import fill_gaps, rowcol_to_a1
+
+from metrics import profiler
+from request_scheduler import ScheduledHTTPClient
+from schedule_table import ScheduleTable
 
 SPREADSHEET_ID = "1vuP1qxZX9sXifzbP0Zk40zfFf7eYbFqk727V4wWU3lU"
 CREDENTIALS_PATH = os.path.join(
     os.path.dirname(__file__), "secrets", "snappy-flash-488807-h4-88e00a722344.json"
 )
 
+# スナップショットキャッシュ保存先（cache/<SPREADSHEET_ID>/<YYYY-MM>.json）
+CACHE_DIR = os.path.join(os.path.dirname(__file__), "cache")
+# アクセストークンのキャッシュ（有効期限まで別プロセスからも再利用する）
+TOKEN_CACHE_PATH = os.path.join(CACHE_DIR, "token.json")
+
 SCOPES = [
     "https://www.googleapis.com/auth/spreadsheets.readonly",
     "https://www.googleapis.com/auth/drive.readonly",
@@ -33,106 +48,604 @@ CLINIC_MAP = {
 # スキップするシフト値（非勤務）
 SKIP_VALUES = {"休", "希", "有", ""}
 
+# 医師名に埋め込まれた勤務時間注記（例: 「守屋Dr\n_~16:30」「林Dr_10:00~」）
+TIME_ANNOTATION_RE = re.compile(r"[\s_]*(\d{1,2}:\d{2})?\s*[~〜～]\s*(\d{1,2}:\d{2})?\s*$")
+
+# シート名 → (年, 月, サフィックス)。「2026.3月」「2024.10 完成 最新」「2024.7修正」等
+SHEET_TITLE_RE = re.compile(r"^\s*(\d{4})\.(\d{1,2})(?!\d)\s*月?(.*)$")
+
+# 集計行（「銀座院Dr人数」等）の医師名列サフィックス
+SUMMARY_SUFFIX = "Dr人数"
+
+# 使用範囲が未知の場合に読む範囲（行, 列）。データは36行・AI列程度（docs/spreadsheet_structure.md）
+DEFAULT_USED_RANGE = (60, 40)
+# 前回検出した使用範囲に足すマージン（医師の追加・列の追加に備える）
+USED_RANGE_MARGIN = (10, 3)
+# 空セル1つあたりのJSONレスポンスサイズ推定値（'"",'）
+EMPTY_CELL_BYTES = 3
+
+# 直近の取得で読み込んだ/省略したセル数の統計（generate.py が表示する）
+fetch_stats: Dict[str, int] = {}
+
+# プロセス内で共有するクライアント（認証済みセッション・コネクションプールを保持）
+_client: Optional[gspread.Client] = None
+
+
+class _TokenCachingCredentials(Credentials):
+    """リフレッシュしたアクセストークンを TOKEN_CACHE_PATH に保存するサービスアカウント認証情報。"""
+
+    def refresh(self, request: Any) -> None:
+        super().refresh(request)
+        _save_token(self)
+
+
+def _save_token(creds: Credentials) -> None:
+    """アクセストークンと有効期限を所有者のみ読み書き可能なファイルに保存する。"""
+    if not creds.token or creds.expiry is None:
+        return
+    os.makedirs(os.path.dirname(TOKEN_CACHE_PATH), exist_ok=True)
+    token = {
+        "client_email": creds.service_account_email,
+        "scopes": sorted(creds.scopes or []),
+        "token": creds.token,
+        "expiry": creds.expiry.isoformat(),
+    }
+    tmp_path = f"{TOKEN_CACHE_PATH}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(token, f)
+    os.replace(tmp_path, TOKEN_CACHE_PATH)
+
+
+def _restore_token(creds: Credentials) -> None:
+    """同じサービスアカウント・スコープの未失効トークンがあれば認証情報に設定する。
+
+    有効期限切れ（または間近）の場合は何もせず、初回リクエスト時に通常どおりリフレッシュされる。
+    """
+    try:
+        with open(TOKEN_CACHE_PATH, encoding="utf-8") as f:
+            token = json.load(f)
+    except (OSError, ValueError):
+        return
+    if token.get("client_email") != creds.service_account_email:
+        return
+    if token.get("scopes") != sorted(creds.scopes or []):
+        return
+    creds.token = token["token"]
+    # google-auth は naive UTC で有効期限を扱う
+    creds.expiry = datetime.fromisoformat(token["expiry"])
+
+
+def get_client() -> gspread.Client:
+    """プロセス内で共有するgspreadクライアントを返す。
+
+    初回のみ認証JSONを読み込み、以降は同じ認証済みセッションを再利用する。
+    アクセストークンはディスクにもキャッシュされ、有効期限内なら後続プロセスでも
+    トークン交換のリクエストを省略する。全リクエストは request_scheduler 経由で
+    クォータ内に抑えられ、429・5xx は自動で再試行される。
+    """
+    global _client
+    if _client is not None:
+        return _client
 
-def _get_client() -> gspread.Client:
     creds_path = os.path.abspath(CREDENTIALS_PATH)
     if not os.path.exists(creds_path):
         raise FileNotFoundError(f"認証JSONが見つかりません: {creds_path}")
-    creds = Credentials.from_service_account_file(creds_path, scopes=SCOPES)
-    return gspread.authorize(creds)
+    creds = _TokenCachingCredentials.from_service_account_file(creds_path, scopes=SCOPES)
+    _restore_token(creds)
+    _client = gspread.authorize(creds, http_client=ScheduledHTTPClient)
+    return _client
 
 
-def _find_sheet(
-    spreadsheet: gspread.Spreadsheet, year: int, month: int
-) -> gspread.Worksheet:
-    """指定年月のワークシートを検索する。"""
-    target_name = f"{year}.{month}月"
-    worksheets = spreadsheet.worksheets()
+def _title_rank(suffix: str, index: int) -> Tuple[int, int, int]:
+    """同じ年月のシートが複数ある場合の優先度（大きいほど優先）。
 
-    # 完全一致優先
-    for ws in worksheets:
-        if ws.title == target_name:
-            return ws
+    「最新」付き > 完成/確定 > 修正 > サフィックスなし > のコピー の順で、
+    同順位ならタブ位置が左（＝新しく作られた）シートを優先する。
+    """
+    if "コピー" in suffix:
+        tier = 0
+    elif "完成" in suffix or "確定" in suffix:
+        tier = 3
+    elif "修正" in suffix:
+        tier = 2
+    else:
+        tier = 1
+    return int("最新" in suffix), tier, -index
 
-    # 前方一致フォールバック（「2026.2月  のコピー」等を除外するため完全一致を優先）
-    for ws in worksheets:
-        if ws.title.startswith(target_name):
-            return ws
 
-    raise ValueError(f"シートが見つかりません: {target_name}")
+def build_title_index(sheets: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """ワークシート一覧から "YYYY-MM" → 採用するシート情報 のインデックスを構築する。
 
+    「2026.3月」「2024.10 完成 最新」「2024.7修正」等の命名揺れを吸収し、
+    テスト用シート（「テスト」「占部テスト」）は除外する。
+    """
+    best: Dict[str, Tuple[Tuple[int, int, int], Dict[str, Any]]] = {}
+    for sheet in sheets:
+        title = sheet["title"]
+        match = SHEET_TITLE_RE.match(title)
+        if not match or "テスト" in title:
+            continue
+        year, month = int(match.group(1)), int(match.group(2))
+        if not 1 <= month <= 12:
+            continue
 
-def fetch_schedule(month: Optional[str] = None) -> List[Dict[str, Any]]:
-    """Google SheetsからDrシフトデータを取得する。
+        index = sheet.get("index", len(best))
+        rank = _title_rank(match.group(3), index)
+        key = f"{year:04d}-{month:02d}"
+        if key not in best or rank > best[key][0]:
+            grid = sheet.get("gridProperties", {})
+            best[key] = (
+                rank,
+                {
+                    "id": sheet.get("sheetId"),
+                    "title": title,
+                    "row_count": grid.get("rowCount", 0),
+                    "col_count": grid.get("columnCount", 0),
+                },
+            )
+    return {key: info for key, (_, info) in best.items()}
 
-    Args:
-        month: "YYYY-MM" 形式。省略時は今月。
 
-    Returns:
-        List[dict] — 各dictのキー: date, doctor_name, clinic_name, start_time, end_time
+def _index_path() -> str:
+    return os.path.join(CACHE_DIR, SPREADSHEET_ID, "index.json")
+
+
+def _get_title_index(client: gspread.Client, revision: str) -> Dict[str, Dict[str, Any]]:
+    """タイトルインデックスを返す。リビジョンごとに1回だけメタデータを取得して構築する。"""
+    try:
+        with open(_index_path(), encoding="utf-8") as f:
+            cached = json.load(f)
+        if revision and cached.get("revision") == revision:
+            return cached["sheets"]
+    except (OSError, ValueError):
+        pass
+
+    params = {
+        "fields": "sheets.properties(sheetId,title,index,gridProperties(rowCount,columnCount))"
+    }
+    metadata = client.http_client.fetch_sheet_metadata(SPREADSHEET_ID, params=params)
+    index = build_title_index([sheet["properties"] for sheet in metadata.get("sheets", [])])
+
+    os.makedirs(os.path.dirname(_index_path()), exist_ok=True)
+    tmp_path = f"{_index_path()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"revision": revision, "sheets": index}, f, ensure_ascii=False)
+    os.replace(tmp_path, _index_path())
+    return index
+
+
+def _resolve_sheet(index: Dict[str, Dict[str, Any]], year: int, month: int) -> Dict[str, Any]:
+    """タイトルインデックスから指定年月のシート情報を引く。"""
+    key = f"{year:04d}-{month:02d}"
+    if key not in index:
+        raise ValueError(f"シートが見つかりません: {year}.{month}月")
+    return index[key]
+
+
+def _a1_sheet(title: str, rows: int = 0, cols: int = 0) -> str:
+    """シート名をA1表記のレンジに変換する（'は''にエスケープ）。
+
+    rows/cols を省略した場合はシート全体を表す。
+    """
+    escaped = title.replace("'", "''")
+    if rows and cols:
+        return f"'{escaped}'!A1:{rowcol_to_a1(rows, cols)}"
+    return f"'{escaped}'"
+
+
+def _detect_used_range(
+    all_values: List[List[str]], year: int, month: int
+) -> Optional[Tuple[int, int]]:
+    """日付行と集計行（院別Dr人数）から実データの使用範囲 (行数, 列数) を求める。
+
+    月末日の列または集計行が見つからない場合（レイアウト変更・範囲不足）は None を返す。
     """
+    if len(all_values) < 5:
+        return None
+
+    last_day = calendar.monthrange(year, month)[1]
+    date_row = [cell.strip() for cell in all_values[2]]
+    if str(last_day) not in date_row[2:]:
+        return None
+
+    summary_rows = [
+        idx
+        for idx, row in enumerate(all_values)
+        if len(row) > 1 and row[1].strip().endswith(SUMMARY_SUFFIX)
+    ]
+    if not summary_rows:
+        return None
+
+    rows = summary_rows[-1] + 1
+    cols = max(
+        (i + 1 for row in all_values[:rows] for i, cell in enumerate(row) if cell.strip()),
+        default=0,
+    )
+    return rows, cols
+
+
+def _reaches_bound(
+    all_values: List[List[str]], bound: Tuple[int, int], sheet: Dict[str, Any]
+) -> bool:
+    """範囲指定で読んだデータが、要求した行数・列数の端まで埋まっているか。
+
+    シート全体より小さい範囲を読んでいて端まで値がある場合、範囲外にも
+    データ（追加された医師・集計行など）が続いている可能性がある。
+    """
+    rows, cols = bound
+    row_count, col_count = sheet["row_count"], sheet["col_count"]
+    if (not row_count or rows < row_count) and len(all_values) >= rows:
+        return True
+    used_cols = max((len(row) for row in all_values), default=0)
+    return (not col_count or cols < col_count) and used_cols >= cols
+
+
+def _parse_month(month: Optional[str]) -> Tuple[int, int]:
+    """"YYYY-MM" → (year, month)。省略時は今月。"""
     if month is None:
         today = date.today()
-        year, mon = today.year, today.month
-    else:
-        dt = datetime.strptime(month, "%Y-%m")
-        year, mon = dt.year, dt.month
+        return today.year, today.month
+    dt = datetime.strptime(month, "%Y-%m")
+    return dt.year, dt.month
+
+
+def get_revision(client: gspread.Client) -> str:
+    """Drive APIからスプレッドシートのリビジョンを取得する（メタデータのみの軽量リクエスト）。
+
+    version（変更ごとに単調増加）を優先し、取得できない場合は modifiedTime を使う。
+    """
+    url = f"{DRIVE_FILES_API_V3_URL}/{SPREADSHEET_ID}"
+    params = {"supportsAllDrives": True, "fields": "version,modifiedTime"}
+    metadata = client.http_client.request("get", url, params=params).json()
+    return str(metadata.get("version") or metadata.get("modifiedTime", ""))
+
+
+def _snapshot_path(year: int, month: int) -> str:
+    return os.path.join(CACHE_DIR, SPREADSHEET_ID, f"{year:04d}-{month:02d}.json")
+
 
-    client = _get_client()
-    spreadsheet = client.open_by_key(SPREADSHEET_ID)
-    ws = _find_sheet(spreadsheet, year, mon)
+def has_snapshot(year: int, month: int) -> bool:
+    """year年month月のスナップショットが保存済みか（内容は検証しない）。"""
+    return os.path.exists(_snapshot_path(year, month))
 
-    all_values = ws.get_all_values()
 
+def _load_snapshot(year: int, month: int) -> Optional[Dict[str, Any]]:
+    """保存済みスナップショットを読み込む。存在しない・壊れている場合はNone。"""
+    path = _snapshot_path(year, month)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if snapshot.get("spreadsheet_id") != SPREADSHEET_ID:
+        return None
+    return snapshot
+
+
+def _save_snapshot(
+    year: int,
+    month: int,
+    title: str,
+    revision: str,
+    values: List[List[str]],
+    used_range: Optional[Tuple[int, int]] = None,
+) -> None:
+    """スナップショットを書き出す。書き込み途中のファイルを残さないよう一時ファイル経由で置換する。"""
+    path = _snapshot_path(year, month)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    snapshot = {
+        "spreadsheet_id": SPREADSHEET_ID,
+        "title": title,
+        "revision": revision,
+        "fetched_at": datetime.now().isoformat(timespec="seconds"),
+        "used_range": list(used_range) if used_range else None,
+        "values": values,
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def load_sheet_values(
+    months: List[Tuple[int, int]], offline: bool = False, missing_ok: bool = False
+) -> Dict[Tuple[int, int], List[List[str]]]:
+    """複数年月のシート全セル値をまとめて取得する。
+
+    リビジョンがスナップショットと一致する月はDriveメタデータ1回のみで済ませ、
+    残りの月は values.batchGet 1回でまとめてダウンロードする（シート名の解決は
+    リビジョンごとにキャッシュしたタイトルインデックスを使う）。
+    読み込むのは日付行・集計行から求めた使用範囲のみで、範囲に収まらなかった月だけ
+    シート全体を読み直す。
+    offline=True の場合はネットワークに一切触れずスナップショットだけを使う。
+    missing_ok=True の場合、シート（offline ではスナップショット）がない月はエラーにせず空のグリッドを返す。
+    """
+    fetch_stats.update(
+        cache_hits=0, cells_requested=0, cells_skipped=0, bytes_skipped=0, fallbacks=0
+    )
+    snapshots = {ym: _load_snapshot(*ym) for ym in months}
+
+    if offline:
+        for ym, snapshot in snapshots.items():
+            if snapshot is None and not missing_ok:
+                raise FileNotFoundError(
+                    f"オフライン用スナップショットがありません: {_snapshot_path(*ym)}"
+                )
+        return {ym: snapshot["values"] if snapshot else [] for ym, snapshot in snapshots.items()}
+
+    client = get_client()
+    revision = get_revision(client)
+
+    results: Dict[Tuple[int, int], List[List[str]]] = {}
+    stale: List[Tuple[int, int]] = []
+    for ym, snapshot in snapshots.items():
+        if snapshot is not None and revision and snapshot.get("revision") == revision:
+            results[ym] = snapshot["values"]
+            fetch_stats["cache_hits"] += 1
+        else:
+            stale.append(ym)
+
+    if not stale:
+        return results
+
+    index = _get_title_index(client, revision)
+    if missing_ok:
+        for ym in [ym for ym in stale if f"{ym[0]:04d}-{ym[1]:02d}" not in index]:
+            results[ym] = []
+            stale.remove(ym)
+        if not stale:
+            return results
+    sheets = [_resolve_sheet(index, *ym) for ym in stale]
+    titles = [sheet["title"] for sheet in sheets]
+
+    # 前回の使用範囲（なければ既定値）+ マージンだけを読む
+    bounds: List[Tuple[int, int]] = []
+    for ym, sheet in zip(stale, sheets):
+        snapshot = snapshots[ym]
+        hint = tuple(snapshot["used_range"]) if snapshot and snapshot.get("used_range") else None
+        rows, cols = (
+            (hint[0] + USED_RANGE_MARGIN[0], hint[1] + USED_RANGE_MARGIN[1])
+            if hint
+            else DEFAULT_USED_RANGE
+        )
+        bounds.append((min(rows, sheet["row_count"] or rows), min(cols, sheet["col_count"] or cols)))
+
+    response = client.http_client.values_batch_get(
+        SPREADSHEET_ID, [_a1_sheet(title, *bound) for title, bound in zip(titles, bounds)]
+    )
+    fetched = {
+        ym: fill_gaps(value_range.get("values", []))
+        for ym, value_range in zip(stale, response.get("valueRanges", []))
+    }
+
+    # 集計行・月末日が範囲内に収まっていない月と、データが範囲の端まで達していて
+    # 範囲外に続いている可能性がある月はシート全体を読み直す（安全側フォールバック）
+    fallback = [
+        (ym, title)
+        for ym, title, sheet, bound in zip(stale, titles, sheets, bounds)
+        if _detect_used_range(fetched[ym], *ym) is None
+        or _reaches_bound(fetched[ym], bound, sheet)
+    ]
+    if fallback:
+        response = client.http_client.values_batch_get(
+            SPREADSHEET_ID, [_a1_sheet(title) for _, title in fallback]
+        )
+        for (ym, _), value_range in zip(fallback, response.get("valueRanges", [])):
+            fetched[ym] = fill_gaps(value_range.get("values", []))
+
+    fallback_months = {ym for ym, _ in fallback}
+    for ym, title, sheet, bound in zip(stale, titles, sheets, bounds):
+        grid_cells = sheet["row_count"] * sheet["col_count"]
+        requested = grid_cells if ym in fallback_months else bound[0] * bound[1]
+        fetch_stats["cells_requested"] += requested
+        fetch_stats["cells_skipped"] += max(grid_cells - requested, 0)
+        fetch_stats["fallbacks"] += ym in fallback_months
+
+        all_values = fetched[ym]
+        _save_snapshot(*ym, title, revision, all_values, _detect_used_range(all_values, *ym))
+        results[ym] = all_values
+
+    fetch_stats["bytes_skipped"] = fetch_stats["cells_skipped"] * EMPTY_CELL_BYTES
+    return results
+
+
+def month_range(start_month: str, end_month: str) -> List[Tuple[int, int]]:
+    """"YYYY-MM" 〜 "YYYY-MM"（両端含む）の (year, month) リストを返す。"""
+    year, mon = _parse_month(start_month)
+    end = _parse_month(end_month)
+    if (year, mon) > end:
+        raise ValueError(f"期間の指定が不正です: {start_month} 〜 {end_month}")
+
+    months: List[Tuple[int, int]] = []
+    while (year, mon) <= end:
+        months.append((year, mon))
+        year, mon = (year + 1, 1) if mon == 12 else (year, mon + 1)
+    return months
+
+
+class ParsedSheet(NamedTuple):
+    """1か月分のシートの解析結果。"""
+
+    # (日付序数, 医師名, クリニック名, 開始時刻, 終了時刻)
+    shifts: List[Tuple[int, str, str, str, str]]
+    # 医師名 → グループ（col A、セルマージされた先頭行の値を後続行に引き継ぐ）
+    groups: Dict[str, str]
+    # 集計行: クリニック名 → {日付: 人数}
+    summary: Dict[str, Dict[date, int]]
+    # 集計行と解析結果の人数が一致しなかった (日付, クリニック名, 集計値, 解析値)
+    mismatches: List[Tuple[date, str, int, int]]
+
+
+def _split_time_annotation(raw_name: str) -> Tuple[str, str, str]:
+    """「守屋Dr\n_~16:30」のような医師名から (医師名, 開始時刻, 終了時刻) を取り出す。"""
+    match = TIME_ANNOTATION_RE.search(raw_name)
+    if not match or not (match.group(1) or match.group(2)):
+        return raw_name.strip(), "", ""
+
+    def _normalize(value: Optional[str]) -> str:
+        if not value:
+            return ""
+        hour, minute = value.split(":")
+        return f"{int(hour):02d}:{minute}"
+
+    return raw_name[: match.start()].strip(), _normalize(match.group(1)), _normalize(match.group(2))
+
+
+def parse_sheet_values(all_values: List[List[str]], year: int, mon: int) -> ParsedSheet:
+    """シートのセル値を1パスで解析する。
+
+    医師行からシフト・グループ・勤務時間注記を、集計行（院別Dr人数）から日別人数を取り出し、
+    集計行と解析したシフト数を突き合わせる。
+    """
     # 最低5行必要（タイトル行・空行・日付行・曜日行・データ行）
     if len(all_values) < 5:
-        return []
+        return ParsedSheet([], {}, {}, [])
 
     # 行2（index 2）: 日付（1〜31）、col C(index 2)から開始
     date_row = all_values[2]
 
-    # col_index -> date オブジェクトのマップを構築
-    date_col_map: Dict[int, date] = {}
+    # (col_index, 日付) の組を構築
+    date_cols: List[Tuple[int, date]] = []
     for col_idx in range(2, len(date_row)):
         cell_val = date_row[col_idx].strip()
         if cell_val.isdigit():
-            day = int(cell_val)
             try:
-                date_col_map[col_idx] = date(year, mon, day)
+                date_cols.append((col_idx, date(year, mon, int(cell_val))))
             except ValueError:
                 pass  # 月末を超える日付はスキップ
+    ordinal_cols = [(col_idx, shift_date.toordinal()) for col_idx, shift_date in date_cols]
 
-    results: List[Dict[str, Any]] = []
+    shifts: List[Tuple[int, str, str, str, str]] = []
+    groups: Dict[str, str] = {}
+    summary: Dict[str, Dict[date, int]] = {}
+    counts: Dict[Tuple[int, str], int] = {}
+    group = ""
 
-    # 行4（index 4）以降: 医師シフトデータ
+    # 行4（index 4）以降: 医師シフトデータと末尾の集計行
     for row in all_values[4:]:
-        if not any(cell.strip() for cell in row):
+        row_len = len(row)
+        raw_name = row[1] if row_len > 1 else ""
+        if row_len > 0 and row[0].strip():
+            group = row[0].strip()
+        if not raw_name or not raw_name.strip():
             continue
 
-        doctor_name = row[1].strip() if len(row) > 1 else ""
-        if not doctor_name:
+        if raw_name.strip().endswith(SUMMARY_SUFFIX):
+            clinic_name = raw_name.strip()[: -len(SUMMARY_SUFFIX)]
+            day_counts = summary.setdefault(clinic_name, {})
+            for col_idx, shift_date in date_cols:
+                if col_idx < row_len and row[col_idx].strip().isdigit():
+                    day_counts[shift_date] = int(row[col_idx])
             continue
 
-        for col_idx, shift_date in date_col_map.items():
-            if col_idx >= len(row):
-                continue
-            shift_val = row[col_idx].strip()
+        doctor_name, start_time, end_time = _split_time_annotation(raw_name)
+        if group:
+            groups[doctor_name] = group
 
-            if shift_val in SKIP_VALUES:
+        for col_idx, ordinal in ordinal_cols:
+            if col_idx >= row_len:
+                break
+            cell = row[col_idx]
+            # 非勤務（休/希/有/空）・未知のシフト値は CLINIC_MAP に無いのでスキップされる
+            clinic_name = CLINIC_MAP.get(cell) or CLINIC_MAP.get(cell.strip())
+            if clinic_name is None:
                 continue
-            if shift_val not in CLINIC_MAP:
-                continue  # 未知のシフト値はスキップ
+            shifts.append((ordinal, doctor_name, clinic_name, start_time, end_time))
+            key = (ordinal, clinic_name)
+            counts[key] = counts.get(key, 0) + 1
 
-            results.append(
-                {
-                    "date": shift_date.strftime("%Y-%m-%d"),
-                    "doctor_name": doctor_name,
-                    "clinic_name": CLINIC_MAP[shift_val],
-                    "start_time": "",
-                    "end_time": "",
-                }
-            )
+    mismatches = [
+        (shift_date, clinic_name, expected, counts.get((shift_date.toordinal(), clinic_name), 0))
+        for clinic_name, day_counts in summary.items()
+        for shift_date, expected in day_counts.items()
+        if counts.get((shift_date.toordinal(), clinic_name), 0) != expected
+    ]
+    return ParsedSheet(shifts, groups, summary, mismatches)
 
-    # 日付→医師名順でソート
-    results.sort(key=lambda e: (e["date"], e["doctor_name"]))
-    return results
+
+def _build_table(sheets: List[ParsedSheet]) -> ScheduleTable:
+    """解析結果を日付→医師名順に並べて ScheduleTable に格納する。
+
+    集計行との人数の不一致は fetch_stats["summary_mismatches"] に記録する。
+    """
+    shifts = [shift for sheet in sheets for shift in sheet.shifts]
+    shifts.sort(key=itemgetter(0, 1))
+    table = ScheduleTable()
+    for shift in shifts:
+        table.append(*shift)
+    for sheet in sheets:
+        table.doctor_groups.update(sheet.groups)
+    fetch_stats["summary_mismatches"] = sum(len(sheet.mismatches) for sheet in sheets)
+    return table
+
+
+def _load_months(
+    months: List[Tuple[int, int]], offline: bool, source: Optional[Any], missing_ok: bool = False
+) -> Dict[Tuple[int, int], List[List[str]]]:
+    """source（data_sources.DataSource）指定時はそこから、それ以外はGoogle Sheetsから読み込む。"""
+    if source is not None:
+        return source.load_values(months, missing_ok=missing_ok)
+    return load_sheet_values(months, offline=offline, missing_ok=missing_ok)
+
+
+def fetch_schedule(
+    month: Optional[str] = None, offline: bool = False, source: Optional[Any] = None
+) -> ScheduleTable:
+    """Google SheetsからDrシフトデータを取得する。
+
+    取得したシートは cache/ 配下にスナップショットとして保存され、
+    スプレッドシートのリビジョンが変わらない限り再ダウンロードしない。
+
+    Args:
+        month: "YYYY-MM" 形式。省略時は今月。
+        offline: Trueの場合、ネットワークを使わず最後のスナップショットから読み込む。
+        source: data_sources.open_source() で作成したデータソース。省略時はGoogle Sheets。
+
+    Returns:
+        ScheduleTable — 日付→医師名順。イテレーションすると従来と同じく
+        date, doctor_name, clinic_name, start_time, end_time を持つdictを返す
+        （List[dict] が必要な場合は to_dicts()）。
+    """
+    year, mon = _parse_month(month)
+    with profiler.stage("fetch.load"):
+        all_values = _load_months([(year, mon)], offline, source)[(year, mon)]
+    with profiler.stage("fetch.parse"):
+        return _build_table([parse_sheet_values(all_values, year, mon)])
+
+
+def fetch_schedule_range(
+    start_month: str,
+    end_month: str,
+    offline: bool = False,
+    source: Optional[Any] = None,
+    missing_ok: bool = False,
+) -> ScheduleTable:
+    """複数月のDrシフトデータをまとめて取得する。
+
+    シート名の解決はメタデータ取得1回、セル値は values.batchGet 1回で行う。
+
+    Args:
+        start_month: 開始月 "YYYY-MM"（含む）
+        end_month: 終了月 "YYYY-MM"（含む）
+        offline: Trueの場合、ネットワークを使わず最後のスナップショットから読み込む。
+        source: data_sources.open_source() で作成したデータソース。省略時はGoogle Sheets。
+        missing_ok: Trueの場合、シートがまだない月（先の月など）をエラーにせずシフトなしとして扱う。
+
+    Returns:
+        fetch_schedule() と同じ形式の ScheduleTable（全期間を日付→医師名順でソート）
+    """
+    months = month_range(start_month, end_month)
+    with profiler.stage("fetch.load"):
+        values_by_month = _load_months(months, offline, source, missing_ok)
+    return schedule_from_values(values_by_month)
+
+
+def schedule_from_values(values_by_month: Dict[Tuple[int, int], List[List[str]]]) -> ScheduleTable:
+    """読み込み済みの (year, month) → シート全セル値 から ScheduleTable を構築する。"""
+    with profiler.stage("fetch.parse"):
+        return _build_table(
+            [parse_sheet_values(values_by_month[ym], *ym) for ym in sorted(values_by_month)]
+        )
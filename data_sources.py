@@ -0,0 +1,237 @@
+"""
+data_sources.py — シートグリッドの取得元（データソース）
+
+fetch_schedule() / fetch_schedule_range() の source 引数に渡して使う。
+Google Sheets 以外に、ローカルの JSON スナップショット・CSV・XLSX から
+ネットワークや認証情報なしでシフトデータを読み込める。
+
+使用例:
+    source = open_source("json:docs/spreadsheet_structure.json")
+    entries = fetch_schedule(month="2026-03", source=source)
+
+--watch のテストには、記録したリビジョンを順に再生する "replay:<ディレクトリ>" を使う。
+"""
+
+import csv
+import json
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+from data_fetcher import build_title_index, get_client, get_revision, load_sheet_values
+
+# --source の書式: "<種類>" または "<種類>:<パス>"
+SOURCE_KINDS = ("sheets", "offline", "json", "csv", "xlsx", "replay")
+
+
+class DataSource(ABC):
+    """シートグリッドの取得元の基底クラス。"""
+
+    @abstractmethod
+    def load_values(
+        self, months: List[Tuple[int, int]], missing_ok: bool = False
+    ) -> Dict[Tuple[int, int], List[List[str]]]:
+        """(year, month) ごとのシート全セル値を返す。
+
+        missing_ok=True ならシートがない月はエラーにせず空のグリッド（[]）を返す。
+        """
+
+    def revision(self) -> Optional[str]:
+        """現在のリビジョン（--watch のポーリング用）。
+
+        "" はリビジョンを持たない（毎回セル値を比較する）、None は今後変更がないことを表す。
+        """
+        return ""
+
+
+class SheetsSource(DataSource):
+    """Google Sheets（スナップショットキャッシュ経由）。offline=True ならキャッシュのみ。"""
+
+    def __init__(self, offline: bool = False) -> None:
+        self.offline = offline
+
+    def load_values(
+        self, months: List[Tuple[int, int]], missing_ok: bool = False
+    ) -> Dict[Tuple[int, int], List[List[str]]]:
+        return load_sheet_values(months, offline=self.offline, missing_ok=missing_ok)
+
+    def revision(self) -> Optional[str]:
+        # オフラインではスナップショットが変わらない
+        if self.offline:
+            return None
+        return get_revision(get_client())
+
+
+class LocalSource(DataSource):
+    """シート名 → グリッドを持つローカルファイルの基底クラス。
+
+    シート名の解決は Google Sheets と同じタイトルインデックス（完成/修正等の優先順位）を使う。
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._index: Optional[Dict[str, Dict]] = None
+
+    @abstractmethod
+    def sheet_titles(self) -> List[str]:
+        """タブ順（先頭が新しい）のシート名一覧。"""
+
+    @abstractmethod
+    def read_sheet(self, title: str) -> List[List[str]]:
+        """シート名 title の全セル値を返す。"""
+
+    def _title_index(self) -> Dict[str, Dict]:
+        if self._index is None:
+            self._index = build_title_index(
+                [{"title": title, "index": i} for i, title in enumerate(self.sheet_titles())]
+            )
+        return self._index
+
+    def has_month(self, year: int, month: int) -> bool:
+        """year年month月のシートがあるか（シート本体は読まない）。"""
+        return f"{year:04d}-{month:02d}" in self._title_index()
+
+    def load_values(
+        self, months: List[Tuple[int, int]], missing_ok: bool = False
+    ) -> Dict[Tuple[int, int], List[List[str]]]:
+        index = self._title_index()
+        results: Dict[Tuple[int, int], List[List[str]]] = {}
+        for year, month in months:
+            key = f"{year:04d}-{month:02d}"
+            if key in index:
+                results[(year, month)] = self.read_sheet(index[key]["title"])
+            elif missing_ok:
+                results[(year, month)] = []
+            else:
+                raise ValueError(f"シートが見つかりません: {year}.{month}月 ({self.path})")
+        return results
+
+
+class JsonSnapshotSource(LocalSource):
+    """scripts/fetch_sheets.py が出力する JSON（docs/spreadsheet_structure.json 形式）。
+
+    各シートに全セル値 "values" があればそれを使い、なければ headers + sample_rows を使う。
+    """
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path)
+        self._load(path)
+
+    def _load(self, path: str) -> None:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        self._sheets = {sheet["title"]: sheet for sheet in data.get("sheets", [])}
+        self._revision = str(data.get("revision", ""))
+        self._index = None
+
+    def sheet_titles(self) -> List[str]:
+        return list(self._sheets)
+
+    def read_sheet(self, title: str) -> List[List[str]]:
+        sheet = self._sheets[title]
+        if "values" in sheet:
+            return sheet["values"]
+        return [sheet.get("headers", [])] + sheet.get("sample_rows", [])
+
+
+class CsvSource(LocalSource):
+    """Google Sheets の「CSV形式でダウンロード」を集めたディレクトリ。
+
+    ファイル名（拡張子なし）をシート名として扱う。例: "2026.3月.csv"
+    """
+
+    def sheet_titles(self) -> List[str]:
+        names = sorted(
+            (name for name in os.listdir(self.path) if name.lower().endswith(".csv")),
+            reverse=True,
+        )
+        return [os.path.splitext(name)[0] for name in names]
+
+    def read_sheet(self, title: str) -> List[List[str]]:
+        with open(os.path.join(self.path, f"{title}.csv"), encoding="utf-8-sig", newline="") as f:
+            return list(csv.reader(f))
+
+
+class XlsxSource(LocalSource):
+    """Google Sheets の「Microsoft Excel (.xlsx) 形式でダウンロード」したブック。
+
+    openpyxl が必要（任意依存）。
+    """
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path)
+        try:
+            import openpyxl
+        except ImportError as e:
+            raise ImportError("XLSXの読み込みには openpyxl が必要です: pip install openpyxl") from e
+        self._workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+
+    def sheet_titles(self) -> List[str]:
+        return list(self._workbook.sheetnames)
+
+    def read_sheet(self, title: str) -> List[List[str]]:
+        return [
+            [_cell_text(value) for value in row]
+            for row in self._workbook[title].iter_rows(values_only=True)
+        ]
+
+
+class ReplaySource(JsonSnapshotSource):
+    """記録したリビジョンを順に再生するデータソース（--watch のテスト用）。
+
+    ディレクトリ内の JSON（scripts/fetch_sheets.py --full のアーカイブ形式）をファイル名順に読み、
+    revision() を呼ぶたびに次の記録へ進む。最後の記録を返した後は None を返す。
+    """
+
+    def __init__(self, path: str) -> None:
+        self._recordings = sorted(
+            os.path.join(path, name)
+            for name in os.listdir(path)
+            if name.lower().endswith(".json")
+        )
+        if not self._recordings:
+            raise ValueError(f"再生するリビジョンがありません: {path}")
+        self._position = 0
+        super().__init__(self._recordings[0])
+
+    def revision(self) -> Optional[str]:
+        if self._position >= len(self._recordings):
+            return None
+        path = self._recordings[self._position]
+        if self._position > 0:
+            self.path = path
+            self._load(path)
+        self._position += 1
+        return self._revision or os.path.basename(path)
+
+
+def _cell_text(value: object) -> str:
+    """XLSXのセル値を Sheets の表示値と同じ文字列に揃える（1.0 → "1"）。"""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def open_source(spec: str) -> DataSource:
+    """--source の指定文字列からデータソースを作成する。
+
+    "sheets" / "offline" / "json:<パス>" / "csv:<ディレクトリ>" / "xlsx:<パス>" / "replay:<ディレクトリ>"
+    """
+    kind, _, path = spec.partition(":")
+    if kind not in SOURCE_KINDS:
+        raise ValueError(f"不明なデータソースです: {spec}（{' / '.join(SOURCE_KINDS)}）")
+    if kind == "sheets":
+        return SheetsSource()
+    if kind == "offline":
+        return SheetsSource(offline=True)
+    if not path:
+        raise ValueError(f"データソースのパスを指定してください: {kind}:<パス>")
+    if kind == "json":
+        return JsonSnapshotSource(path)
+    if kind == "csv":
+        return CsvSource(path)
+    if kind == "replay":
+        return ReplaySource(path)
+    return XlsxSource(path)
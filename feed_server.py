@@ -0,0 +1,355 @@
+"""
+feed_server.py — 生成済みファイルのローカル配信（generate.py serve）
+
+出力ディレクトリの .ics / .png を HTTP で配信する。
+- ETag は内容のハッシュで、If-None-Match が一致すれば 304 を返す（本文を送らない）
+- .ics は Accept-Encoding: gzip のクライアントに gzip で返す（圧縮結果もキャッシュ）
+- よく使われるファイルはメモリ上の LRU キャッシュから返す（更新時刻・サイズで検証）
+- ファイルがない場合や ?regenerate=1 の場合は、ファイル名から生成タイプ・対象期間を判断し、
+  キャッシュ済みのスケジュール（デフォルトは offline スナップショット）から生成し直す。
+  生成するのは、以前に生成した（出力マニフェストに記録がある）ファイルか、対象月のデータが
+  データソースにある場合だけ（存在しない月へのアクセスでは生成しない。poem はデータ不要）
+- 生成は一時ファイルへの書き込み + 置換で行われるため、生成中も書きかけのファイルは配信しない
+
+外部への通信は行わず、デフォルトでは 127.0.0.1 だけで待ち受ける。
+
+使用例:
+    python generate.py serve
+    python generate.py serve --port 8080 --output output/
+"""
+
+import argparse
+import gzip
+import hashlib
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict
+from datetime import date
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from output_manifest import OutputManifest
+
+CONTENT_TYPES = {".ics": "text/calendar; charset=utf-8", ".png": "image/png"}
+# gzip で返す拡張子（PNG は圧縮済みのため対象外）
+GZIP_TYPES = {".ics"}
+# メモリ上にキャッシュするファイルの合計サイズ（非圧縮 + gzip）
+HOT_CACHE_BYTES = 64 * 1024 * 1024
+
+# ファイル名 → generate.py の引数（再生成用）
+_ICAL_RE = re.compile(r"schedule_(\d{4})(\d{2})(?:-(\d{4})(\d{2}))?(_(?:doctor|clinic)_.+)?\.ics")
+_CALENDAR_RE = re.compile(r"calendar_(\d{4})(\d{2})\.png")
+_SCHEDULE_RE = re.compile(r"schedule_(\d{4})(\d{2})(\d{2})_.+\.png")
+_POEM_RE = re.compile(r"poem_(\d{4})(\d{2})(\d{2})\.png")
+
+
+class CachedFile(NamedTuple):
+    mtime_ns: int
+    size: int
+    etag: str
+    body: bytes
+    # gzip 対象外なら None
+    gzip_body: Optional[bytes]
+
+
+def generate_args(name: str, feeds: bool = False) -> Optional[List[str]]:
+    """出力ファイル名から、そのファイルを生成する generate.py の引数を返す（判断できなければ None）。
+
+    feeds=True なら全体の .ics でも --ical-feeds を付け、医師別・クリニック別フィードも生成し直す
+    （付けずに生成すると、その期間の医師別・クリニック別フィードが古い出力として削除される）。
+    """
+    if name == "schedule_rolling.ics":
+        return ["--type", "ical", "--rolling"]
+    match = _ICAL_RE.fullmatch(name)
+    if match:
+        year, month, to_year, to_month, feed = match.groups()
+        args = ["--type", "ical"]
+        if to_year:
+            args += ["--from", f"{year}-{month}", "--to", f"{to_year}-{to_month}"]
+        else:
+            args += ["--month", f"{year}-{month}"]
+        return args + (["--ical-feeds"] if feed or feeds else [])
+    match = _CALENDAR_RE.fullmatch(name)
+    if match:
+        return ["--type", "calendar", "--month", "-".join(match.groups())]
+    match = _SCHEDULE_RE.fullmatch(name)
+    if match:
+        year, month, day = match.groups()
+        # --date だけでは今月分を取得するため、対象月も指定する
+        return [
+            "--type", "schedule", "--month", f"{year}-{month}", "--date", f"{year}-{month}-{day}"
+        ]
+    match = _POEM_RE.fullmatch(name)
+    if match:
+        return ["--type", "poem", "--date", "-".join(match.groups())]
+    return None
+
+
+class FeedStore:
+    """出力ディレクトリのファイルを ETag・gzip 付きで読み出す（LRU キャッシュ + 再生成）。"""
+
+    def __init__(
+        self,
+        output_dir: str,
+        source: str = "offline",
+        regenerate: bool = True,
+        cache_bytes: int = HOT_CACHE_BYTES,
+    ) -> None:
+        self.output_dir = output_dir
+        self.source = source
+        self.regenerate = regenerate
+        self.cache_bytes = cache_bytes
+        self.stats = {"hits": 0, "misses": 0, "regenerated": 0}
+        self._cache: "OrderedDict[str, CachedFile]" = OrderedDict()
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+        # 生成はマニフェスト・状態ファイルを書き換えるため1件ずつ行う
+        self._generate_lock = threading.Lock()
+
+    def path_for(self, name: str) -> Optional[str]:
+        """配信対象のファイル名ならパスを返す（サブディレクトリ・隠しファイル・対象外の拡張子は None）。"""
+        if not name or "/" in name or "\\" in name or name.startswith("."):
+            return None
+        if os.path.splitext(name)[1] not in CONTENT_TYPES:
+            return None
+        return os.path.join(self.output_dir, name)
+
+    def get(self, name: str, refresh: bool = False) -> Optional[CachedFile]:
+        """ファイルを読み出す。ない場合（refresh 時は常に）再生成を試みる。"""
+        path = self.path_for(name)
+        if path is None:
+            return None
+        if self.regenerate and (refresh or not os.path.exists(path)):
+            self._generate(name, refresh)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return None
+
+        # 開いたファイルの stat を使い、キャッシュの検証と読み込みを同じ版で行う
+        # （生成は os.replace で置き換えるため、開いたファイルの内容は途中で変わらない）
+        with f:
+            stat = os.fstat(f.fileno())
+            with self._lock:
+                cached = self._cache.get(name)
+                if cached and (cached.mtime_ns, cached.size) == (stat.st_mtime_ns, stat.st_size):
+                    self._cache.move_to_end(name)
+                    self.stats["hits"] += 1
+                    return cached
+                self.stats["misses"] += 1
+            body = f.read()
+        gzip_body = None
+        if os.path.splitext(name)[1] in GZIP_TYPES:
+            gzip_body = gzip.compress(body, mtime=0)
+        etag = hashlib.sha256(body).hexdigest()[:32]
+        cached = CachedFile(stat.st_mtime_ns, stat.st_size, etag, body, gzip_body)
+        self._store(name, cached)
+        return cached
+
+    def _store(self, name: str, cached: CachedFile) -> None:
+        size = len(cached.body) + len(cached.gzip_body or b"")
+        if size > self.cache_bytes:
+            return
+        with self._lock:
+            old = self._cache.pop(name, None)
+            if old is not None:
+                self._cached_bytes -= len(old.body) + len(old.gzip_body or b"")
+            self._cache[name] = cached
+            self._cached_bytes += size
+            while self._cached_bytes > self.cache_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cached_bytes -= len(evicted.body) + len(evicted.gzip_body or b"")
+
+    def _can_generate(
+        self, name: str, parsed: argparse.Namespace, manifest: OutputManifest
+    ) -> bool:
+        """生成してよいか（存在しない月のファイル名へのアクセスで生成を走らせないための判定）。
+
+        以前に生成した（マニフェストに記録がある）ファイルか、対象月のデータがある場合だけ True。
+        データの有無は sheets / offline ならスナップショット、ローカルファイルのデータソースなら
+        そのシート一覧で判断する。poem はシフトデータを使わないため日付が正しければ True。
+        """
+        from data_fetcher import has_snapshot, month_range
+        from data_sources import open_source
+
+        if name in manifest.entries:
+            return True
+        try:
+            if parsed.date:
+                date.fromisoformat(parsed.date)
+            if parsed.type == ["poem"]:
+                return True
+            if parsed.from_month:
+                months = month_range(parsed.from_month, parsed.to_month)
+            else:
+                year, month = parsed.month.split("-")
+                months = [(int(year), int(month))]
+        except ValueError:
+            # schedule_202612-202601.ics のような逆順の期間や、poem_20261399.png のような日付
+            return False
+
+        if self.source in ("sheets", "offline"):
+            has_month = has_snapshot
+        else:
+            try:
+                has_month = open_source(self.source).has_month
+            except (OSError, ValueError):
+                return False
+        # --rolling はシートがまだない先の月を空として扱うため、どれか1か月あればよい
+        check = any if parsed.rolling else all
+        return check(has_month(*ym) for ym in months)
+
+    def _generate(self, name: str, refresh: bool = False) -> None:
+        manifest = OutputManifest(self.output_dir)
+        # 以前に医師別・クリニック別フィードも生成していた .ics は、同じフィード一式で生成し直す
+        stem = os.path.splitext(name)[0]
+        feeds = name.endswith(".ics") and any(
+            other.startswith((f"{stem}_doctor_", f"{stem}_clinic_")) for other in manifest.entries
+        )
+        args = generate_args(name, feeds)
+        if args is None:
+            return
+        import generate
+
+        try:
+            parsed = generate.parse_args(
+                args + ["--source", self.source, "--output", self.output_dir]
+            )
+        except SystemExit:
+            # 引数エラーなど（generate 側でメッセージを表示済み）
+            return
+        if not self._can_generate(name, parsed, manifest):
+            return
+
+        with self._generate_lock:
+            # 待っている間に同じファイルが他のリクエストで生成された場合は生成しない
+            if not refresh and os.path.exists(self.path_for(name)):
+                return
+            try:
+                generate.run_types(parsed, parsed.type)
+            except SystemExit:
+                return
+            except Exception as e:  # noqa: BLE001
+                # スナップショットのない月など。既存のファイルがあればそのまま配信する
+                print(f"生成できませんでした: {name}: {e}", file=sys.stderr)
+                return
+            self.stats["regenerated"] += 1
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match（カンマ区切り・弱いETag・*）が etag（gzip 版も含む）に一致するか。"""
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate.strip('"') in (etag, f"{etag}-gz"):
+            return True
+    return False
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    """GET / HEAD /<ファイル名> に応答する。store はサーバ生成時に設定する。"""
+
+    store: FeedStore
+    server_version = "doctor-calendar"
+
+    def do_HEAD(self) -> None:
+        self._respond(send_body=False)
+
+    def do_GET(self) -> None:
+        self._respond(send_body=True)
+
+    def _respond(self, send_body: bool) -> None:
+        url = urlsplit(self.path)
+        name = unquote(url.path).lstrip("/")
+        refresh = parse_qs(url.query).get("regenerate", [""])[0] in ("1", "true")
+        cached = self.store.get(name, refresh=refresh)
+        if cached is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+
+        use_gzip = cached.gzip_body is not None and "gzip" in self.headers.get(
+            "Accept-Encoding", ""
+        )
+        etag = f"{cached.etag}-gz" if use_gzip else cached.etag
+        headers: List[Tuple[str, str]] = [
+            ("ETag", f'"{etag}"'),
+            ("Cache-Control", "no-cache"),
+        ]
+        if cached.gzip_body is not None:
+            headers.append(("Vary", "Accept-Encoding"))
+
+        if _etag_matches(self.headers.get("If-None-Match", ""), cached.etag):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            for key, value in headers:
+                self.send_header(key, value)
+            self.end_headers()
+            return
+
+        body = cached.gzip_body if use_gzip else cached.body
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", CONTENT_TYPES[os.path.splitext(name)[1]])
+        self.send_header("Content-Length", str(len(body)))
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        for key, value in headers:
+            self.send_header(key, value)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+
+def make_server(
+    store: FeedStore, host: str = "127.0.0.1", port: int = 8000
+) -> ThreadingHTTPServer:
+    """store を配信する HTTP サーバを作る（serve_forever() で開始）。"""
+    handler = type("BoundFeedHandler", (FeedHandler,), {"store": store})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="generate.py serve", description="生成済みの .ics / .png をローカルで配信する"
+    )
+    parser.add_argument("--output", default="output/", help="配信する出力ディレクトリ")
+    parser.add_argument(
+        "--host", default="127.0.0.1", help="待ち受けアドレス（デフォルト: 127.0.0.1）"
+    )
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--source",
+        default="offline",
+        help="再生成に使うデータ取得元（デフォルト: offline = cache/ のスナップショット）",
+    )
+    parser.add_argument(
+        "--no-regenerate",
+        action="store_true",
+        help="ファイルがない場合に生成し直さない",
+    )
+    args = parser.parse_args(argv)
+
+    store = FeedStore(args.output, source=args.source, regenerate=not args.no_regenerate)
+    server = make_server(store, args.host, args.port)
+    print(
+        f"配信中: http://{args.host}:{server.server_port}/"
+        f"（{os.path.abspath(args.output)}、Ctrl+Cで終了）"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(
+            f"終了しました（キャッシュ ヒット{store.stats['hits']} / ミス{store.stats['misses']}"
+            f" / 再生成{store.stats['regenerated']}）"
+        )
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,62 @@
+"""
+fonts.py — 画像モジュール共通のフォントレジストリ
+
+フォントパスはプロセス内で1回だけ解決し、読み込んだ FreeTypeFont は
+(path, size, index) をキーにLRUキャッシュする。
+image_schedule / image_calendar / image_poem の全フォント取得はここを通る。
+"""
+
+import os
+from functools import lru_cache
+from typing import Dict, Optional
+
+from PIL import ImageFont
+
+# フォントパス（優先順）
+FONT_PATHS = [
+    "/System/Library/Fonts/ヒラギノ角ゴシック W3.ttc",
+    "/System/Library/Fonts/ヒラギノ角ゴシック W4.ttc",
+    "/System/Library/Fonts/Supplemental/HiraginoSans.ttc",
+    "/System/Library/Fonts/ヒラギノ角ゴシック W2.ttc",
+    # フォールバック: fonts/配下のNoto Sans JP
+    os.path.join(os.path.dirname(__file__), "fonts", "NotoSansJP-Regular.ttf"),
+    os.path.join(os.path.dirname(__file__), "fonts", "NotoSansJP-Medium.ttf"),
+]
+
+# 保持するフォントオブジェクト数（1画像あたり最大7サイズ × 数画像分）
+FONT_CACHE_SIZE = 64
+
+
+@lru_cache(maxsize=None)
+def resolve_font_path() -> Optional[str]:
+    """FONT_PATHS のうち最初に存在するパスを返す（プロセス内で1回だけ探索）。"""
+    for path in FONT_PATHS:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+@lru_cache(maxsize=FONT_CACHE_SIZE)
+def _load_font(path: Optional[str], size: int, index: int) -> ImageFont.FreeTypeFont:
+    if path is None:
+        return ImageFont.load_default()
+    try:
+        return ImageFont.truetype(path, size, index=index)
+    except OSError:
+        return ImageFont.load_default()
+
+
+def get_font(size: int, index: int = 0) -> ImageFont.FreeTypeFont:
+    """日本語フォントを返す。見つからない場合はデフォルトフォント。
+
+    Args:
+        size: フォントサイズ(px)
+        index: .ttc 内のフェイス番号
+    """
+    return _load_font(resolve_font_path(), size, index)
+
+
+def font_cache_stats() -> Dict[str, int]:
+    """フォントキャッシュのヒット・ミス数と現在の保持数を返す。"""
+    info = _load_font.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize}
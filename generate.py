@@ -7,136 +7,545 @@ generate.py — docrot-calendar CLIエントリーポイント
     python generate.py --type schedule --month 2026-03
     python generate.py --type calendar --month 2026-03
     python generate.py --type ical --month 2026-03
+    python generate.py --type schedule --month 2026-03 --offline
+    python generate.py --type ical --from 2024-07 --to 2026-05
+    python generate.py --type calendar --month 2026-03 --source csv:exports/
+    python generate.py --type schedule --month 2026-03 --jobs 4
+    python generate.py --type all --month 2026-03
+    python generate.py --type schedule,ical --month 2026-03
+    python generate.py serve --port 8000
 """
 
 import argparse
+import importlib
 import os
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
+from typing import List, Optional
+
+# 重いモジュール（gspread・google-auth・PIL・icalendar）は使う生成タイプの実行時にだけ読み込む。
+# 起動時間は scripts/bench_startup.py で計測できる
+from metrics import CAPTURE_KINDS, profiler
+from output_manifest import OutputManifest, atomic_write, input_hash
+
+
+_print_lock = threading.Lock()
+
+
+def _log(*args, **kwargs) -> None:
+    """並行実行中のステージから1行ずつ崩れずに出力する print。"""
+    with _print_lock:
+        print(*args, **kwargs)
+
+
+def _target_months(args: argparse.Namespace) -> list:
+    """--from/--to 指定時はその期間、それ以外は --month（省略時は今月）の "YYYY-MM" リストを返す。"""
+    if not args.from_month:
+        return [args.month or date.today().strftime("%Y-%m")]
+
+    from data_fetcher import month_range
+
+    return [f"{year:04d}-{mon:02d}" for year, mon in month_range(args.from_month, args.to_month)]
+
+
+def _shift_month(month: str, offset: int) -> str:
+    """"YYYY-MM" を offset ヶ月ずらす。"""
+    year, mon = map(int, month.split("-"))
+    index = year * 12 + mon - 1 + offset
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def _parse_window(value: str) -> tuple:
+    """--rolling の "前:後"（基準月の何ヶ月前から何ヶ月後まで）を (前, 後) にする。"""
+    before, sep, after = value.partition(":")
+    try:
+        window = (int(before), int(after)) if sep else None
+    except ValueError:
+        window = None
+    if window is None or min(window) < 0:
+        raise argparse.ArgumentTypeError(f"前:後 の月数で指定してください（例: 1:2）: {value}")
+    return window
+
+
+def _render_settings(**settings) -> dict:
+    """出力の入力ハッシュに含める描画設定（使用フォント + 各生成タイプの設定）。"""
+    from fonts import resolve_font_path
+
+    return {"font": resolve_font_path(), **settings}
+
+
+def _fetch_entries(args: argparse.Namespace) -> tuple:
+    """対象期間のスケジュールを取得し、(表示ラベル, エントリ) を返す。
+
+    --from/--to 指定時は fetch_schedule_range() で全期間を1回のバッチ取得で読み込む。
+    """
+    from data_fetcher import fetch_schedule, fetch_schedule_range, fetch_stats
+    from data_sources import open_source
+    from request_scheduler import scheduler
+
+    source = open_source("offline" if args.offline and args.source == "sheets" else args.source)
+    if args.from_month:
+        label = f"{args.from_month}〜{args.to_month}"
+        print(f"スケジュール取得中: {label} ...")
+        # --rolling の期間は先の月を含むため、シートがまだない月はシフトなしとして扱う
+        entries = fetch_schedule_range(
+            args.from_month, args.to_month, source=source, missing_ok=bool(args.rolling)
+        )
+    else:
+        label = args.month or date.today().strftime("%Y-%m")
+        print(f"スケジュール取得中: {label} ...")
+        entries = fetch_schedule(month=label, source=source)
+
+    if fetch_stats.get("cells_requested"):
+        print(
+            f"取得セル数: {fetch_stats['cells_requested']}"
+            f"（省略: {fetch_stats['cells_skipped']}セル / 約{fetch_stats['bytes_skipped']}バイト"
+            f", 全体再取得: {fetch_stats['fallbacks']}シート）"
+        )
+    if scheduler.stats["requests"]:
+        print(
+            f"APIリクエスト: {scheduler.stats['requests']}回"
+            f"（再試行: {scheduler.stats['retries']}回, 共有: {scheduler.stats['coalesced']}回"
+            f", 待機: {scheduler.stats['throttled_seconds']:.1f}秒）"
+        )
+    if fetch_stats.get("summary_mismatches"):
+        print(
+            f"警告: 集計行（院別Dr人数）と人数が一致しない日が"
+            f"{fetch_stats['summary_mismatches']}件あります",
+            file=sys.stderr,
+        )
+    profiler.count(
+        "fetch.load",
+        snapshot_cache_hits=fetch_stats.get("cache_hits", 0),
+        cells_requested=fetch_stats.get("cells_requested", 0),
+        api_requests=scheduler.stats["requests"],
+        api_retries=scheduler.stats["retries"],
+    )
+    profiler.count("fetch.parse", items=len(entries))
+    return label, entries
 
-# オプションモジュール: 未実装の場合はImportErrorをキャッチしてスキップ
-try:
-    from image_calendar import generate_calendar_image
 
-    _has_calendar = True
-except ImportError:
-    _has_calendar = False
+def _write_schedule_images(args, entries, manifest, in_scope) -> None:
+    """出勤情報ストーリー画像のうち、入力が変わったものだけを生成する。
 
-try:
-    from image_poem import generate_poem_image
+    in_scope(日付) が真の範囲で entries に無くなったシフトの画像は削除する。
+    """
+    from batch_render import render_schedule_batch
+    from image_schedule import TEMPLATE_VERSION
 
-    _has_poem = True
-except ImportError:
-    _has_poem = False
+    settings = _render_settings(template_version=TEMPLATE_VERSION)
+    out_paths = []
+    tasks = []
+    digests = {}
+    for entry in entries:
+        date_slug = entry["date"].replace("-", "")
+        doctor_safe = entry["doctor_name"].replace("/", "_").replace(" ", "_")
+        filename = f"schedule_{date_slug}_{doctor_safe}.png"
+        out_path = os.path.join(args.output, filename)
+        out_paths.append(out_path)
+        digest = input_hash("schedule", entry, settings)
+        if manifest.is_current(out_path, digest):
+            continue
+        tasks.append((entry, out_path))
+        digests[out_path] = (entry["date"], digest)
 
-try:
-    from ical_generator import generate_ical
+    for out_path in render_schedule_batch(tasks, jobs=args.jobs):
+        _log(f"生成: {out_path}")
+        manifest.record(out_path, "schedule", *digests[out_path])
 
-    _has_ical = True
-except ImportError:
-    _has_ical = False
+    for out_path in manifest.remove_stale("schedule", in_scope, out_paths):
+        _log(f"削除: {out_path}")
 
-from data_fetcher import fetch_schedule
-from image_schedule import generate_schedule_image
 
+def _write_calendar_images(args, schedule_data, months, manifest) -> None:
+    """指定月のカレンダー画像のうち、入力が変わったものだけを生成する。"""
+    from image_calendar import generate_calendar_image
 
-def cmd_schedule(args: argparse.Namespace) -> None:
-    """--type schedule: 出勤情報ストーリー画像を生成する。"""
-    month = args.month or date.today().strftime("%Y-%m")
-    target_date = args.date
+    settings = _render_settings()
+    for month in months:
+        month_data = schedule_data.for_month(month)
+        out_path = os.path.join(args.output, f"calendar_{month.replace('-', '')}.png")
+        digest = input_hash("calendar", {"month": month, "entries": list(month_data)}, settings)
+        if manifest.is_current(out_path, digest):
+            continue
+        with profiler.output("calendar", out_path):
+            generate_calendar_image(schedule_data=month_data, month=month, output_path=out_path)
+        manifest.record(out_path, "calendar", month, digest)
+        _log(f"生成: {out_path}")
+
+
+def _write_ical(args, schedule_data, months, label, manifest) -> None:
+    """対象期間の .ics を、入力が変わった場合だけ生成する。
+
+    イベントの版（SEQUENCE・最終変更時刻）は出力ディレクトリの .ical_state.json で管理し、
+    対象期間から消えたシフトは STATUS:CANCELLED として出力する。
+    --ical-feeds 指定時は全体に加えて医師別・クリニック別の .ics も1回の走査で生成する。
+    --rolling 指定時は固定名の schedule_rolling.ics を生成する（_write_rolling_ical）。
+    """
+    if args.rolling:
+        _write_rolling_ical(args, schedule_data, months, label, manifest)
+        return
 
-    print(f"スケジュール取得中: {month} ...")
-    entries = fetch_schedule(month=month)
+    from ical_generator import PRODID, generate_ical, write_ical_feeds
+    from ical_state import STATE_VERSION, IcalState
 
-    if not entries:
-        print(f"スケジュールデータが見つかりません: {month}", file=sys.stderr)
+    # start_time/end_timeが空の場合はデフォルト値を補完（ical_generator要件）
+    schedule_data = schedule_data.to_dicts(default_start_time="09:00", default_end_time="18:00")
+
+    slug = months[0].replace("-", "")
+    if len(months) > 1:
+        slug += "-" + months[-1].replace("-", "")
+    out_path = os.path.join(args.output, f"schedule_{slug}.ics")
+    settings = {"prodid": PRODID, "state": STATE_VERSION, "feeds": args.ical_feeds}
+    digest = input_hash("ical", schedule_data, settings)
+    if manifest.is_current(out_path, digest):
+        return
+    state = IcalState(args.output)
+    scope = (f"{months[0]}-01", f"{months[-1]}-31")
+
+    def _feed_path(kind: str, name: str) -> str:
+        if kind == "all":
+            return out_path
+        name_safe = name.replace("/", "_").replace(" ", "_")
+        return os.path.join(args.output, f"schedule_{slug}_{kind}_{name_safe}.ics")
+
+    with profiler.output("ical", out_path):
+        if args.ical_feeds:
+            feeds = write_ical_feeds(schedule_data, _feed_path, state=state, scope=scope)
+            kept = [feed_path for feed_path, _ in feeds.values()]
+        else:
+            generate_ical(
+                schedule_data=schedule_data, output_path=out_path, state=state, scope=scope
+            )
+            kept = [out_path]
+    state.save()
+    profiler.count("ical", events=len(schedule_data), feeds=len(kept), **state.stats)
+    for feed_path in kept:
+        manifest.record(feed_path, "ical", label, digest)
+    feeds_note = f" ほか医師別・クリニック別 {len(kept) - 1}件" if args.ical_feeds else ""
+    _log(f"生成: {out_path}{feeds_note} ({len(schedule_data)}件 — {state.summary()})")
+    # 今回いなくなった医師・クリニックのフィードや、--ical-feeds なしに戻した場合の
+    # 医師別・クリニック別フィードを削除する
+    for removed_path in manifest.remove_stale("ical", lambda group: group == label, kept):
+        _log(f"削除: {removed_path}")
+
+
+def _write_rolling_ical(args, schedule_data, months, label, manifest) -> None:
+    """--rolling: 対象期間の月ごとの VEVENT ブロックを連結して schedule_rolling.ics を生成する。
+
+    ブロックは出力ディレクトリの .ical_blocks/YYYY-MM.vevents に保存し、
+    シフトが変わった月のブロックだけをエンコードし直す（マニフェストの kind は "ical-block"）。
+    シートがまだない先の月は空のブロックとして扱い、フィード全体は生成する。
+    """
+    from ical_generator import PRODID, event_block, write_ical_blocks
+    from ical_state import STATE_VERSION, IcalState
+
+    settings = {"prodid": PRODID, "state": STATE_VERSION}
+    month_entries = {}
+    block_digests = {}
+    for month in months:
+        month_entries[month] = schedule_data.for_month(month).to_dicts(
+            default_start_time="09:00", default_end_time="18:00"
+        )
+        block_digests[month] = input_hash(
+            "ical-block", {"month": month, "entries": month_entries[month]}, settings
+        )
+
+    out_path = os.path.join(args.output, ROLLING_ICAL_NAME)
+    digest = input_hash("ical-rolling", block_digests, settings)
+    if manifest.is_current(out_path, digest):
         return
 
-    if target_date:
-        entries = [e for e in entries if e["date"] == target_date]
-        if not entries:
-            print(f"指定日のデータなし: {target_date}", file=sys.stderr)
-            return
+    state = None
+    blocks = []
+    rebuilt = []
+    with profiler.output("ical", out_path):
+        for month in months:
+            block_path = os.path.join(args.output, ICAL_BLOCK_DIR, f"{month}.vevents")
+            if manifest.is_current(block_path, block_digests[month]):
+                with open(block_path, "rb") as f:
+                    blocks.append(f.read())
+                continue
+            if state is None:
+                state = IcalState(args.output)
+            block = event_block(
+                month_entries[month], state=state, scope=(f"{month}-01", f"{month}-31")
+            )
+            with atomic_write(block_path) as f:
+                f.write(block)
+            manifest.record(block_path, "ical-block", month, block_digests[month])
+            blocks.append(block)
+            rebuilt.append(month)
+        with atomic_write(out_path) as f:
+            write_ical_blocks(blocks, f)
+    if state is not None:
+        state.save()
+        profiler.count("ical", **state.stats)
+    events = sum(len(entries) for entries in month_entries.values())
+    profiler.count("ical", events=events, blocks_rebuilt=len(rebuilt))
+    # 同じ期間の --from/--to の出力（group が期間ラベル）の remove_stale() で消されないよう、
+    # group は期間ではなく固定名にする
+    manifest.record(out_path, "ical", ROLLING_ICAL_NAME, digest)
+    empty = [month for month in months if not month_entries[month]]
+    _log(
+        f"生成: {out_path} ({months[0]}〜{months[-1]} / {events}件"
+        f" — 再エンコード: {', '.join(rebuilt) or 'なし'}"
+        + (f" / シフトなし: {', '.join(empty)}" if empty else "")
+        + ")"
+    )
 
-    os.makedirs(args.output, exist_ok=True)
-    count = 0
-    for entry in entries:
-        date_slug = entry["date"].replace("-", "")
-        doctor_safe = entry["doctor_name"].replace("/", "_").replace(" ", "_")
-        filename = f"schedule_{date_slug}_{doctor_safe}.png"
-        out_path = os.path.join(args.output, filename)
-        generate_schedule_image(entry, out_path)
-        print(f"生成: {out_path}")
-        count += 1
 
-    print(f"完了: {count}件生成しました")
+def stage_schedule(args: argparse.Namespace, label: str, entries, manifest) -> None:
+    """schedule: 出勤情報ストーリー画像を生成する。"""
+    from batch_render import font_stats
 
+    target_date = args.date
 
-def cmd_calendar(args: argparse.Namespace) -> None:
-    """--type calendar: カレンダー画像を生成する（image_calendar.py実装待ち）。"""
-    if not _has_calendar:
-        print("image_calendar モジュール未実装 (subtask_312b待ち)", file=sys.stderr)
-        sys.exit(1)
+    if not entries:
+        _log(f"スケジュールデータが見つかりません: {label}", file=sys.stderr)
+        return
 
-    month = args.month or date.today().strftime("%Y-%m")
-    os.makedirs(args.output, exist_ok=True)
-    out_path = os.path.join(args.output, f"calendar_{month.replace('-', '')}.png")
-    generate_calendar_image(month=month, output_path=out_path)
-    print(f"生成: {out_path}")
+    if target_date:
+        entries = entries.for_date(target_date)
+        if not entries:
+            # 削除されたシフトの画像は remove_stale() で削除する
+            _log(f"指定日のデータなし: {target_date}", file=sys.stderr)
+        in_scope = lambda group: group == target_date  # noqa: E731
+    else:
+        months = set(_target_months(args))
+        in_scope = lambda group: group[:7] in months  # noqa: E731
+
+    _write_schedule_images(args, entries, manifest, in_scope)
+    _log(f"フォントキャッシュ: ヒット{font_stats['hits']} / ミス{font_stats['misses']}")
+    profiler.count(
+        "schedule", font_cache_hits=font_stats["hits"], font_cache_misses=font_stats["misses"]
+    )
 
 
-def cmd_poem(args: argparse.Namespace) -> None:
-    """--type poem: ポエム画像を生成する。"""
-    if not _has_poem:
-        print("image_poem モジュール未実装 (subtask_312c待ち)", file=sys.stderr)
-        sys.exit(1)
+def stage_calendar(args: argparse.Namespace, label: str, entries, manifest) -> None:
+    """calendar: カレンダー画像を生成する。"""
+    _write_calendar_images(args, entries, _target_months(args), manifest)
+
 
-    from image_poem import POEM_DEFAULTS  # type: ignore
+def stage_poem(args: argparse.Namespace, label: str, entries, manifest) -> None:
+    """poem: ポエム画像を生成する（シフトデータは使わない）。"""
+    from image_poem import POEM_DEFAULTS, generate_poem_image  # type: ignore
     import random
 
     target_date = args.date or date.today().strftime("%Y-%m-%d")
     poem = random.choice(POEM_DEFAULTS)
-    os.makedirs(args.output, exist_ok=True)
     out_path = os.path.join(args.output, f"poem_{target_date.replace('-', '')}.png")
-    generate_poem_image(text=poem["text"], output_path=out_path, author=poem.get("author", ""))
-    print(f"生成: {out_path}")
+    digest = input_hash("poem", poem, _render_settings())
+    if not manifest.is_current(out_path, digest):
+        with profiler.output("poem", out_path):
+            generate_poem_image(
+                text=poem["text"], output_path=out_path, author=poem.get("author", "")
+            )
+        manifest.record(out_path, "poem", target_date, digest)
+        _log(f"生成: {out_path}")
+
+
+def stage_ical(args: argparse.Namespace, label: str, entries, manifest) -> None:
+    """ical: iCalendarファイルを生成する。"""
+    if not entries:
+        _log(f"スケジュールデータが見つかりません: {label}", file=sys.stderr)
+        return
+    _write_ical(args, entries, _target_months(args), label, manifest)
+
+
+# 生成タイプ → (ステージ, 使うモジュール, オプションモジュール未実装時のメッセージ)
+# メッセージが None のモジュールは必須（ImportError をそのまま送出する）
+STAGES = {
+    "schedule": (stage_schedule, ("batch_render",), None),
+    "calendar": (
+        stage_calendar,
+        ("image_calendar",),
+        "image_calendar モジュール未実装 (subtask_312b待ち)",
+    ),
+    "poem": (stage_poem, ("image_poem",), "image_poem モジュール未実装 (subtask_312c待ち)"),
+    "ical": (
+        stage_ical,
+        ("ical_generator", "ical_state"),
+        "ical_generator モジュール未実装 (subtask_312c待ち)",
+    ),
+}
+# --rolling の出力ファイル名と、月ごとの VEVENT ブロックの保存先（出力ディレクトリ内）
+ROLLING_ICAL_NAME = "schedule_rolling.ics"
+ICAL_BLOCK_DIR = ".ical_blocks"
+# シフトデータを使わない生成タイプ
+NO_FETCH_TYPES = {"poem"}
+# シフトデータの取得・解析に使うモジュール
+FETCH_MODULES = ("data_fetcher", "data_sources")
+# --profile のパス省略時の保存先（出力ディレクトリは配信・同期されるため cache/ に置く）
+PROFILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "profile.json")
+
+
+def _import_stage_modules(types: list) -> None:
+    """指定タイプが使うモジュールだけを読み込む。
+
+    オプションモジュールが未実装の場合はメッセージを表示して終了する。
+    """
+    modules = []
+    if any(name not in NO_FETCH_TYPES for name in types):
+        modules.extend((module, None) for module in FETCH_MODULES)
+    for name in types:
+        _, stage_modules, message = STAGES[name]
+        modules.extend((module, message) for module in stage_modules)
+
+    for module, message in modules:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            if message is None:
+                raise
+            print(message, file=sys.stderr)
+            sys.exit(1)
+
+
+def _parse_types(value: str) -> list:
+    """--type の値（"all" またはカンマ区切り）を生成タイプのリストにする。"""
+    if value == "all":
+        return list(STAGES)
+    types = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in types if name not in STAGES]
+    if not types or unknown:
+        raise argparse.ArgumentTypeError(
+            f"不明な生成タイプです: {', '.join(unknown) or value}"
+            f"（{' / '.join(STAGES)} / all、カンマ区切りで複数指定可）"
+        )
+    return list(dict.fromkeys(types))
+
+
+def _run_stages(stages: list) -> None:
+    """互いに独立したステージ（引数なしの関数）を並行実行する。1つなら直接実行する。"""
+    if len(stages) == 1:
+        stages[0]()
+        return
+    with ThreadPoolExecutor(max_workers=len(stages)) as pool:
+        for future in [pool.submit(stage) for stage in stages]:
+            future.result()
 
 
-def cmd_ical(args: argparse.Namespace) -> None:
-    """--type ical: iCalendarファイルを生成する。"""
-    if not _has_ical:
-        print("ical_generator モジュール未実装 (subtask_312c待ち)", file=sys.stderr)
-        sys.exit(1)
+def run_types(args: argparse.Namespace, types: list) -> None:
+    """指定タイプをまとめて生成する。
 
-    month = args.month or date.today().strftime("%Y-%m")
-    print(f"スケジュール取得中: {month} ...")
-    schedule_data = fetch_schedule(month=month)
-    if not schedule_data:
-        print(f"スケジュールデータが見つかりません: {month}", file=sys.stderr)
-        return
+    シフトデータは1回だけ取得・解析し、全ステージで同じ ScheduleTable を共有する。
+    ステージ同士は独立しているため並行実行する（出力マニフェストは共有）。
+    """
+    _import_stage_modules(types)
 
-    # start_time/end_timeが空の場合はデフォルト値を補完（ical_generator要件）
-    for entry in schedule_data:
-        if not entry.get("start_time"):
-            entry["start_time"] = "09:00"
-        if not entry.get("end_time"):
-            entry["end_time"] = "18:00"
+    label, entries = "", None
+    if any(name not in NO_FETCH_TYPES for name in types):
+        with profiler.stage("fetch"):
+            label, entries = _fetch_entries(args)
 
     os.makedirs(args.output, exist_ok=True)
-    out_path = os.path.join(args.output, f"schedule_{month.replace('-', '')}.ics")
-    generate_ical(schedule_data=schedule_data, output_path=out_path)
-    print(f"生成: {out_path} ({len(schedule_data)}件)")
+    manifest = OutputManifest(args.output, force=args.force)
+
+    def _stage_runner(name):
+        def _run() -> None:
+            with profiler.stage(name):
+                STAGES[name][0](args, label, entries, manifest)
+
+        return _run
+
+    _run_stages([_stage_runner(name) for name in types])
+    manifest.save()
+    print(f"完了: {manifest.summary()}")
+
+    if profiler.enabled:
+        profiler.count("manifest", **manifest.stats)
+        print(profiler.summary())
+        print(f"計測結果: {profiler.write_json()}")
 
 
-def main() -> None:
+def run_watch(args: argparse.Namespace, types: list) -> None:
+    """--watch: スプレッドシートの変更を監視し、影響のある出力だけを生成し直す。
+
+    schedule は変更のあった日付の画像（変わった医師の分だけ再描画・消えたシフトは削除）、
+    calendar は変更のあった月の画像、ical は対象期間の .ics を生成し直す。
+    """
+    types = [name for name in types if name not in NO_FETCH_TYPES]
+    if not types:
+        print("--watch は schedule / calendar / ical のみ対応しています", file=sys.stderr)
+        sys.exit(1)
+    _import_stage_modules(types)
+
+    from data_fetcher import month_range, schedule_from_values
+    from data_sources import open_source
+    from watcher import watch
+
+    source = open_source("offline" if args.offline and args.source == "sheets" else args.source)
+    months = _target_months(args)
+    label = f"{months[0]}〜{months[-1]}" if len(months) > 1 else months[0]
+    os.makedirs(args.output, exist_ok=True)
+
+    def _on_change(values, changes) -> None:
+        schedule_data = schedule_from_values(values)
+        manifest = OutputManifest(args.output, force=args.force and changes is None)
+        if changes is None:
+            print(f"監視開始: {label}（{args.interval:g}秒間隔）")
+            dates = None
+            changed_months = months
+        else:
+            dates = {day for change in changes.values() for day, _ in change.shifts}
+            changed_months = [f"{year:04d}-{mon:02d}" for year, mon in sorted(changes)]
+            cells = sum(len(change.cells) for change in changes.values())
+            print(f"変更検出: {', '.join(changed_months)}（{cells}セル / {len(dates)}日）")
+
+        stages = []
+        if "schedule" in types:
+            if dates is None:
+                month_set = set(months)
+                stages.append(
+                    lambda: _write_schedule_images(
+                        args, schedule_data, manifest, lambda group: group[:7] in month_set
+                    )
+                )
+            elif dates:
+                entries = [entry for day in sorted(dates) for entry in schedule_data.for_date(day)]
+                stages.append(
+                    lambda: _write_schedule_images(
+                        args, entries, manifest, lambda group: group in dates
+                    )
+                )
+        if "calendar" in types:
+            stages.append(
+                lambda: _write_calendar_images(args, schedule_data, changed_months, manifest)
+            )
+        if "ical" in types and (dates is None or dates):
+            # 対象期間を1ファイルにまとめているため、シフトに変更があれば生成し直す
+            stages.append(lambda: _write_ical(args, schedule_data, months, label, manifest))
+        if stages:
+            _run_stages(stages)
+        manifest.save()
+        print(f"完了: {manifest.summary()}")
+
+    try:
+        watch(
+            source,
+            month_range(months[0], months[-1]),
+            _on_change,
+            args.interval,
+            missing_ok=bool(args.rolling),
+        )
+    except KeyboardInterrupt:
+        print("監視を終了しました")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """生成用の引数を解析・検証する（feed_server の再生成からも使う）。"""
     parser = argparse.ArgumentParser(
         description="docrot-calendar — 医師シフト画像・iCal生成ツール"
     )
     parser.add_argument(
         "--type",
         required=True,
-        choices=["schedule", "calendar", "poem", "ical"],
-        help="生成タイプ: schedule=出勤画像, calendar=カレンダー画像, poem=ポエム画像, ical=iCal",
+        type=_parse_types,
+        help="生成タイプ: schedule=出勤画像, calendar=カレンダー画像, poem=ポエム画像, ical=iCal"
+        "（all で全タイプ、カンマ区切りで複数指定。取得・解析は1回で共有）",
     )
     parser.add_argument(
         "--date",
@@ -146,21 +555,134 @@ def main() -> None:
         "--month",
         help="対象月 YYYY-MM（省略時は今月）",
     )
+    parser.add_argument(
+        "--from",
+        dest="from_month",
+        help="期間指定の開始月 YYYY-MM（--to と併用、schedule/calendar/ical）",
+    )
+    parser.add_argument(
+        "--to",
+        dest="to_month",
+        help="期間指定の終了月 YYYY-MM（--from と併用）",
+    )
     parser.add_argument(
         "--output",
         default="output/",
         help="出力ディレクトリ（デフォルト: output/）",
     )
+    parser.add_argument(
+        "--source",
+        default="sheets",
+        help="データ取得元: sheets / offline / json:<パス> / csv:<ディレクトリ> / xlsx:<パス>"
+        "（デフォルト: sheets）",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="ネットワークを使わず cache/ のスナップショットから生成する",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="schedule 画像を並列生成するプロセス数（デフォルト: 1 = 直列）",
+    )
+    parser.add_argument(
+        "--ical-feeds",
+        action="store_true",
+        help="ical: 全体の .ics に加えて医師別・クリニック別の .ics も生成する",
+    )
+    parser.add_argument(
+        "--rolling",
+        nargs="?",
+        const=(1, 2),
+        type=_parse_window,
+        metavar="BEFORE:AFTER",
+        help="ical: 基準月（--month、省略時は今月）の BEFORE ヶ月前〜AFTER ヶ月後を "
+        "schedule_rolling.ics にまとめる（省略時 1:2）",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="スプレッドシートの変更を監視し、影響のある出力だけを生成し直す（Ctrl+Cで終了）",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=60.0,
+        help="--watch のリビジョン確認間隔（秒、デフォルト: 60）",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="",
+        metavar="JSON",
+        help="ステージ・出力ごとの実時間/CPU時間・件数・バイト数を計測して表示し、JSONに保存する"
+        "（デフォルト: cache/profile.json）",
+    )
+    parser.add_argument(
+        "--profile-capture",
+        metavar="KIND[:TYPE]",
+        help="指定ステージを詳細に記録する: cprofile / tracemalloc"
+        "（:TYPE で対象の生成タイプ、省略時は --type の先頭）",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="出力マニフェストを無視して全ファイルを生成し直す",
+    )
+
+    args = parser.parse_args(argv)
+    if bool(args.from_month) != bool(args.to_month):
+        parser.error("--from と --to は同時に指定してください")
+    if args.jobs < 1:
+        parser.error("--jobs には1以上を指定してください")
+    if args.rolling:
+        # 期間は ical 以外のタイプにも効くため、ical だけの場合に限る
+        if args.type != ["ical"]:
+            parser.error("--rolling は --type ical と組み合わせてください")
+        if args.from_month:
+            parser.error("--rolling は --from/--to と同時に指定できません")
+        if args.ical_feeds:
+            parser.error("--rolling は --ical-feeds と同時に指定できません")
+        base = args.month or date.today().strftime("%Y-%m")
+        before, after = args.rolling
+        args.from_month = _shift_month(base, -before)
+        args.to_month = _shift_month(base, after)
+
+    if args.profile_capture and args.profile is None:
+        parser.error("--profile-capture は --profile と併用してください")
+    if args.profile is not None:
+        if args.watch:
+            parser.error("--profile は --watch と同時に指定できません")
+        kind = (args.profile_capture or "").partition(":")[0]
+        if kind and kind not in CAPTURE_KINDS:
+            parser.error(f"--profile-capture には {' / '.join(CAPTURE_KINDS)} を指定してください")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["serve"]:
+        from feed_server import main as serve_main
+
+        serve_main(argv[1:])
+        return
 
-    args = parser.parse_args()
+    args = parse_args(argv)
+    if args.profile is not None:
+        kind, _, capture_stage = (args.profile_capture or "").partition(":")
+        profiler.enable(
+            args.profile or PROFILE_PATH,
+            capture_kind=kind or None,
+            capture_stage=capture_stage or args.type[0],
+        )
+
+    if args.watch:
+        run_watch(args, args.type)
+        return
 
-    dispatch = {
-        "schedule": cmd_schedule,
-        "calendar": cmd_calendar,
-        "poem": cmd_poem,
-        "ical": cmd_ical,
-    }
-    dispatch[args.type](args)
+    run_types(args, args.type)
 
 
 if __name__ == "__main__":
@@ -1,34 +1,353 @@
 """
 ical_generator.py — スケジュールデータ → iCalendar (.ics) 生成モジュール
 Google Calendar互換 VCALENDAR/VEVENT形式
+
+.ics の書き出しは write_ical() のストリーミング出力で行う。
+icalendar の Calendar を組み立てずに VEVENT 行を直接エスケープ・折り返しして
+チャンク単位で書き込むため、数年分・全医師分のフィードでもメモリを食わない。
+出力は build_calendar().to_ical()（icalendar 7 系）とバイト単位で一致する。
+
+state（ical_state.IcalState）を渡すと、DTSTAMP は実行時刻ではなくイベントの最終変更時刻になり、
+SEQUENCE / LAST-MODIFIED と、消えたシフトの STATUS:CANCELLED を出力する（同じ入力なら同じ .ics）。
 """
 
 from __future__ import annotations
 
-from datetime import datetime, date, time
+from contextlib import ExitStack
+from datetime import datetime, date, time, timezone
+from functools import lru_cache
 from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, Callable, Iterable, Iterator
 from zoneinfo import ZoneInfo
 
-from icalendar import Calendar, Event
+from output_manifest import atomic_write
+
+if TYPE_CHECKING:
+    from icalendar import Calendar
+
+    from ical_state import EventVersion, IcalState
 
 # タイムゾーン
 JST = ZoneInfo("Asia/Tokyo")
 PRODID = "-//Doctor Calendar//Doctor Schedule//JA"
+CALNAME = "Drシフト"
 
+# RFC 5545 の行長上限（オクテット、改行を除く）
+FOLD_LIMIT = 75
+# write_ical() がまとめて書き込む単位（バイト）
+CHUNK_SIZE = 64 * 1024
+FOOTER = b"END:VCALENDAR\r\n"
+# write_ical_feeds() の全体フィードのキー（医師別は ("doctor", 医師名)、クリニック別は ("clinic", クリニック名)）
+FEED_ALL = ("all", "")
 
+
+@lru_cache(maxsize=None)
 def _parse_date(date_str: str) -> date:
     """'YYYY-MM-DD' → date オブジェクト"""
     return datetime.strptime(date_str, "%Y-%m-%d").date()
 
 
+@lru_cache(maxsize=None)
 def _parse_time(time_str: str) -> time:
     """'HH:MM' → time オブジェクト"""
     return datetime.strptime(time_str, "%H:%M").time()
 
 
-def generate_ical(schedule_data: list[dict], output_path: str) -> str:
+@lru_cache(maxsize=None)
+def _ics_datetime(date_str: str, time_str: str) -> str:
+    """'YYYY-MM-DD', 'HH:MM' → 'YYYYMMDDTHHMMSS'（DTSTART/DTEND の値）"""
+    d = _parse_date(date_str)
+    t = _parse_time(time_str)
+    return f"{d.year:04d}{d.month:02d}{d.day:02d}T{t.hour:02d}{t.minute:02d}00"
+
+
+def _escape_text(text: str) -> str:
+    """TEXT 値のエスケープ（RFC 5545 3.3.11、icalendar と同じ置換順）。"""
+    return (
+        text.replace(r"\N", "\n")
+        .replace("\\", "\\\\")
+        .replace(";", r"\;")
+        .replace(",", r"\,")
+        .replace("\r\n", r"\n")
+        .replace("\n", r"\n")
+        .replace("\r", r"\n")
+    )
+
+
+def _fold(line: str) -> str:
+    """1行を75オクテットで折り返す（CRLF + 空白）。
+
+    icalendar と同じく、UTF-8の文字の途中とエスケープ（\\ の直後）では折り返さない。
     """
-    スケジュールデータを .ics ファイルに変換して保存する。
+    if len(line) * 4 < FOLD_LIMIT or len(line.encode("utf-8")) < FOLD_LIMIT:
+        return line
+    folded = []
+    current = []
+    size = 0
+    for char in line:
+        char_size = len(char.encode("utf-8"))
+        if current and size + char_size >= FOLD_LIMIT:
+            if len(current) > 1 and current[-1] in "\\^":
+                prefix = current.pop()
+                folded.append("".join(current))
+                current = [prefix]
+                size = len(prefix.encode("utf-8"))
+            else:
+                folded.append("".join(current))
+                current = []
+                size = 0
+        current.append(char)
+        size += char_size
+    folded.append("".join(current))
+    return "\r\n ".join(folded)
+
+
+def _text_line(name: str, value: str) -> str:
+    return _fold(f"{name}:{_escape_text(value)}")
+
+
+def _dtstamp(dtstamp: datetime | None) -> str:
+    value = (dtstamp or datetime.now(tz=JST)).astimezone(timezone.utc)
+    return value.strftime("%Y%m%dT%H%M%SZ")
+
+
+def _event_fields(entry: dict) -> tuple[str, str, str]:
+    """entry → (SUMMARY, UID, DESCRIPTION) のエスケープ前の値。DESCRIPTION は空なら省略する。"""
+    doctor = entry.get("doctor_name", "")
+    clinic = entry.get("clinic_name", "")
+
+    # SUMMARY: 医師名 + クリニック名
+    summary = f"{doctor}（{clinic}）" if clinic else doctor
+
+    # DESCRIPTION
+    desc_parts = []
+    if doctor:
+        desc_parts.append(f"担当: {doctor}")
+    if clinic:
+        desc_parts.append(f"クリニック: {clinic}")
+    if extra_desc := entry.get("description", ""):
+        desc_parts.append(extra_desc)
+
+    return summary, _uid(entry), "\n".join(desc_parts)
+
+
+def _uid(entry: dict) -> str:
+    """UID（重複防止）: 日付・医師名・クリニック名から決まる。"""
+    doctor = entry.get("doctor_name", "")
+    clinic = entry.get("clinic_name", "")
+    return f"{entry['date']}-{doctor}-{clinic}@doctor-calendar".replace(" ", "_")
+
+
+def _header_lines() -> list[str]:
+    # icalendar の正規順（VERSION, PRODID, ... X-WR-CALNAME → 残りはアルファベット順）
+    return [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        _text_line("PRODID", PRODID),
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        _text_line("X-WR-CALNAME", CALNAME),
+        "X-WR-TIMEZONE:Asia/Tokyo",
+    ]
+
+
+def _event_lines(
+    entry: dict, stamp: str, version: EventVersion | None = None, cancelled: bool = False
+) -> list[str]:
+    """VEVENT 1件分の行。
+
+    icalendar の正規順（SUMMARY, DTSTART, DTEND, DTSTAMP, UID, SEQUENCE → 残りはアルファベット順）。
+    version を渡すと DTSTAMP / LAST-MODIFIED にその最終変更時刻を使う。
+    """
+    summary, uid, description = _event_fields(entry)
+    if version is not None:
+        stamp = version.last_modified
+    date_str = entry["date"]
+    lines = [
+        "BEGIN:VEVENT",
+        _text_line("SUMMARY", summary),
+        f"DTSTART;TZID=Asia/Tokyo:{_ics_datetime(date_str, entry.get('start_time', '09:00'))}",
+        f"DTEND;TZID=Asia/Tokyo:{_ics_datetime(date_str, entry.get('end_time', '18:00'))}",
+        f"DTSTAMP:{stamp}",
+        _text_line("UID", uid),
+    ]
+    if version is not None:
+        lines.append(f"SEQUENCE:{version.sequence}")
+    if description:
+        lines.append(_text_line("DESCRIPTION", description))
+    if version is not None:
+        lines.append(f"LAST-MODIFIED:{version.last_modified}")
+    if cancelled:
+        lines.append("STATUS:CANCELLED")
+    lines.append("END:VEVENT")
+    return lines
+
+
+def _encode(lines: list[str]) -> bytes:
+    return ("\r\n".join(lines) + "\r\n").encode("utf-8")
+
+
+def _iter_events(
+    schedule_data: Iterable[dict],
+    dtstamp: datetime | None,
+    state: IcalState | None,
+    scope: tuple[str, str] | None,
+) -> Iterator[tuple[dict, bytes]]:
+    """(entry, エンコード済みの VEVENT) を順に返す。取り消したイベントは最後にまとめて返す。"""
+    stamp = _dtstamp(dtstamp) if state is None else ""
+    seen = set()
+    for entry in schedule_data:
+        version = None
+        if state is not None:
+            uid = _uid(entry)
+            seen.add(uid)
+            version = state.observe(uid, entry)
+        yield entry, _encode(_event_lines(entry, stamp, version))
+    if state is not None and scope is not None:
+        for fields, version in state.cancel_missing(seen, *scope):
+            yield fields, _encode(_event_lines(fields, stamp, version, cancelled=True))
+
+
+def iter_ical(
+    schedule_data: Iterable[dict],
+    dtstamp: datetime | None = None,
+    state: IcalState | None = None,
+    scope: tuple[str, str] | None = None,
+) -> Iterator[bytes]:
+    """
+    .ics を VEVENT 単位のバイト列で順に返す（先頭はヘッダ、末尾は END:VCALENDAR）。
+
+    Args:
+        schedule_data: build_calendar() と同じ要素のリストまたはジェネレータ
+        dtstamp: 全イベント共通の DTSTAMP（省略時は現在時刻。state 指定時は使わない）
+        state: UID ごとの版管理。指定するとイベントを記録し SEQUENCE / LAST-MODIFIED を出力する
+        scope: このフィードの対象期間 ("YYYY-MM-DD", "YYYY-MM-DD")。state と併用すると、
+            期間内で記録済みなのに schedule_data にないイベントを STATUS:CANCELLED で出力する
+    """
+    yield _encode(_header_lines())
+    for _, block in _iter_events(schedule_data, dtstamp, state, scope):
+        yield block
+    yield FOOTER
+
+
+def write_ical(
+    schedule_data: Iterable[dict],
+    fp: BinaryIO,
+    dtstamp: datetime | None = None,
+    chunk_size: int = CHUNK_SIZE,
+    state: IcalState | None = None,
+    scope: tuple[str, str] | None = None,
+) -> int:
+    """
+    .ics を fp にストリーミングで書き込み、書き込んだバイト数を返す。
+
+    Args:
+        schedule_data: build_calendar() と同じ要素のリストまたはジェネレータ
+        fp: 書き込み先のバイナリファイル/バッファ
+        dtstamp: 全イベント共通の DTSTAMP（省略時は現在時刻）
+        chunk_size: この大きさ以上たまったらまとめて書き込む
+        state, scope: iter_ical() と同じ
+    """
+    pending = []
+    pending_size = 0
+    total = 0
+    for block in iter_ical(schedule_data, dtstamp, state, scope):
+        pending.append(block)
+        pending_size += len(block)
+        if pending_size >= chunk_size:
+            fp.write(b"".join(pending))
+            total += pending_size
+            pending = []
+            pending_size = 0
+    if pending:
+        fp.write(b"".join(pending))
+        total += pending_size
+    return total
+
+
+def event_block(
+    schedule_data: Iterable[dict],
+    dtstamp: datetime | None = None,
+    state: IcalState | None = None,
+    scope: tuple[str, str] | None = None,
+) -> bytes:
+    """
+    VEVENT 部分だけをエンコードする（ヘッダ・END:VCALENDAR なし）。
+
+    月ごとのブロックを保存しておき、write_ical_blocks() で連結して複数月のフィードにする。
+
+    Args:
+        schedule_data, dtstamp, state, scope: iter_ical() と同じ
+    """
+    return b"".join(block for _, block in _iter_events(schedule_data, dtstamp, state, scope))
+
+
+def write_ical_blocks(blocks: Iterable[bytes], fp: BinaryIO) -> int:
+    """event_block() のブロックをヘッダ・END:VCALENDAR で囲んで fp に書き込み、バイト数を返す。"""
+    header = _encode(_header_lines())
+    fp.write(header)
+    total = len(header)
+    for block in blocks:
+        fp.write(block)
+        total += len(block)
+    fp.write(FOOTER)
+    return total + len(FOOTER)
+
+
+def write_ical_feeds(
+    schedule_data: Iterable[dict],
+    path_for: Callable[[str, str], str],
+    dtstamp: datetime | None = None,
+    state: IcalState | None = None,
+    scope: tuple[str, str] | None = None,
+) -> dict[tuple[str, str], tuple[str, int]]:
+    """
+    1回の走査で、全体・医師別・クリニック別の .ics をまとめて書き出す。
+
+    各イベントのエンコードは1回だけで、同じバイト列を該当するフィードのファイルへそのまま書き込む
+    （イベントをメモリにためない）。各ファイルは一時ファイルに書き、最後にまとめて置換する。
+
+    Args:
+        schedule_data, dtstamp, state, scope: iter_ical() と同じ
+        path_for: (種類 "all" / "doctor" / "clinic", 名前) → 出力先パス
+
+    Returns:
+        {FEED_ALL / ("doctor", 医師名) / ("clinic", クリニック名): (出力先パス, イベント数)}
+    """
+    header = _encode(_header_lines())
+    files: dict[tuple[str, str], BinaryIO] = {}
+    counts: dict[tuple[str, str], int] = {}
+    paths: dict[tuple[str, str], str] = {}
+
+    with ExitStack() as stack:
+
+        def _open(key: tuple[str, str]) -> BinaryIO:
+            paths[key] = path_for(*key)
+            f = files[key] = stack.enter_context(atomic_write(paths[key]))
+            f.write(header)
+            counts[key] = 0
+            return f
+
+        def _write(key: tuple[str, str], block: bytes) -> None:
+            (files.get(key) or _open(key)).write(block)
+            counts[key] += 1
+
+        # 全体フィードはイベントがなくても出力する
+        _open(FEED_ALL)
+        for entry, block in _iter_events(schedule_data, dtstamp, state, scope):
+            _write(FEED_ALL, block)
+            if doctor := entry.get("doctor_name", ""):
+                _write(("doctor", doctor), block)
+            if clinic := entry.get("clinic_name", ""):
+                _write(("clinic", clinic), block)
+        for f in files.values():
+            f.write(FOOTER)
+    return {key: (paths[key], counts[key]) for key in files}
+
+
+def build_calendar(schedule_data: Iterable[dict], dtstamp: datetime | None = None) -> Calendar:
+    """
+    スケジュールデータから icalendar の VCALENDAR を組み立てる（write_ical() の比較用）。
 
     Args:
         schedule_data: スケジュールのリスト。各要素は以下のキーを持つ dict:
@@ -38,19 +357,16 @@ def generate_ical(schedule_data: list[dict], output_path: str) -> str:
             - start_time (str): "HH:MM" 形式の開始時刻
             - end_time (str): "HH:MM" 形式の終了時刻
             - description (str, optional): 追加説明
-        output_path: 出力先パス（例: "output/schedule_2026-03.ics"）
-
-    Returns:
-        output_path（保存されたファイルパス）
+        dtstamp: 全イベント共通の DTSTAMP（省略時はイベントごとの現在時刻）
     """
-    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    from icalendar import Calendar, Event
 
     cal = Calendar()
     cal.add("prodid", PRODID)
     cal.add("version", "2.0")
     cal.add("calscale", "GREGORIAN")
     cal.add("method", "PUBLISH")
-    cal.add("x-wr-calname", "Drシフト")
+    cal.add("x-wr-calname", CALNAME)
     cal.add("x-wr-timezone", "Asia/Tokyo")
 
     for entry in schedule_data:
@@ -63,36 +379,63 @@ def generate_ical(schedule_data: list[dict], output_path: str) -> str:
         dt_start = datetime.combine(d, t_start, tzinfo=JST)
         dt_end = datetime.combine(d, t_end, tzinfo=JST)
 
-        doctor = entry.get("doctor_name", "")
-        clinic = entry.get("clinic_name", "")
-
-        # SUMMARY: 医師名 + クリニック名
-        summary = f"{doctor}（{clinic}）" if clinic else doctor
+        summary, uid, description = _event_fields(entry)
         event.add("summary", summary)
         event.add("dtstart", dt_start)
         event.add("dtend", dt_end)
-
-        # DESCRIPTION
-        desc_parts = []
-        if doctor:
-            desc_parts.append(f"担当: {doctor}")
-        if clinic:
-            desc_parts.append(f"クリニック: {clinic}")
-        if extra_desc := entry.get("description", ""):
-            desc_parts.append(extra_desc)
-        if desc_parts:
-            event.add("description", "\n".join(desc_parts))
-
-        # UID（重複防止）
-        uid = f"{entry['date']}-{doctor}-{clinic}@doctor-calendar".replace(" ", "_")
+        if description:
+            event.add("description", description)
         event.add("uid", uid)
 
-        event.add("dtstamp", datetime.now(tz=JST))
+        event.add("dtstamp", dtstamp or datetime.now(tz=JST))
 
         cal.add_component(event)
 
-    ics_bytes = cal.to_ical()
-    Path(output_path).write_bytes(ics_bytes)
+    return cal
+
+
+def ical_bytes(
+    schedule_data: Iterable[dict],
+    fp: BinaryIO | None = None,
+    state: IcalState | None = None,
+    scope: tuple[str, str] | None = None,
+) -> bytes | None:
+    """
+    スケジュールデータを .ics にエンコードする（ファイルには書き込まない）。
+
+    Args:
+        schedule_data: build_calendar() と同じ
+        fp: 書き込み先のバイナリバッファ。省略時は .ics のバイト列を返す
+        state, scope: iter_ical() と同じ
+
+    Returns:
+        .ics のバイト列（fp 指定時は None）
+    """
+    if fp is not None:
+        write_ical(schedule_data, fp, state=state, scope=scope)
+        return None
+    return b"".join(iter_ical(schedule_data, state=state, scope=scope))
+
+
+def generate_ical(
+    schedule_data: Iterable[dict],
+    output_path: str,
+    state: IcalState | None = None,
+    scope: tuple[str, str] | None = None,
+) -> str:
+    """
+    スケジュールデータを .ics ファイルに変換して保存する。
+
+    Args:
+        schedule_data: build_calendar() と同じ
+        output_path: 出力先パス（例: "output/schedule_2026-03.ics"）
+        state, scope: iter_ical() と同じ
+
+    Returns:
+        output_path（保存されたファイルパス）
+    """
+    with atomic_write(output_path) as f:
+        write_ical(schedule_data, f, state=state, scope=scope)
     return output_path
 
 
@@ -0,0 +1,119 @@
+"""
+ical_state.py — .ics のイベント（UID）ごとの版管理
+
+出力ディレクトリの .ical_state.json に、UID ごとのイベント内容・SEQUENCE・LAST-MODIFIED を記録する。
+内容が変わったイベントだけ SEQUENCE を上げて LAST-MODIFIED を更新し、DTSTAMP にも同じ時刻を使う。
+同じ入力からは毎回同じ .ics が生成されるため、購読側のカレンダーは差分だけを取り込める。
+シートから消えたシフトは STATUS:CANCELLED のイベントとして出力し続ける。
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+STATE_NAME = ".ical_state.json"
+STATE_VERSION = 1
+# イベントの内容として比較するフィールド（.ics の出力に影響するもの）
+EVENT_FIELDS = ("date", "doctor_name", "clinic_name", "start_time", "end_time", "description")
+
+
+class EventVersion(NamedTuple):
+    sequence: int
+    # "YYYYMMDDTHHMMSSZ"（LAST-MODIFIED と DTSTAMP の値）
+    last_modified: str
+
+
+def event_fields(entry: Dict) -> Dict[str, str]:
+    """entry から比較・保存用のフィールドを取り出す（ical_generator と同じデフォルト値）。"""
+    return {
+        "date": entry["date"],
+        "doctor_name": entry.get("doctor_name", ""),
+        "clinic_name": entry.get("clinic_name", ""),
+        "start_time": entry.get("start_time", "09:00"),
+        "end_time": entry.get("end_time", "18:00"),
+        "description": entry.get("description", ""),
+    }
+
+
+class IcalState:
+    """UID → {fields, sequence, last_modified, cancelled} の記録。
+
+    変更を検出した時刻は1回の実行（インスタンス）で共通の now を使う。
+    stats に new・changed・unchanged・cancelled の件数を数える。
+    """
+
+    def __init__(self, output_dir: str, now: Optional[datetime] = None) -> None:
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, STATE_NAME)
+        self.now = (now or datetime.now(timezone.utc)).astimezone(timezone.utc).strftime(
+            "%Y%m%dT%H%M%SZ"
+        )
+        self.events: Dict[str, Dict] = {}
+        self.stats = {"new": 0, "changed": 0, "unchanged": 0, "cancelled": 0}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == STATE_VERSION:
+            self.events = data.get("events", {})
+
+    def observe(self, uid: str, entry: Dict) -> EventVersion:
+        """今回出力するイベントを記録し、SEQUENCE と LAST-MODIFIED を返す。
+
+        初出は SEQUENCE 0、内容が変わったか取り消し後に復活した場合は SEQUENCE を1つ上げる。
+        """
+        fields = event_fields(entry)
+        record = self.events.get(uid)
+        if record is None:
+            record = {"fields": fields, "sequence": 0, "last_modified": self.now}
+            self.events[uid] = record
+            self.stats["new"] += 1
+        elif record["fields"] != fields or record.get("cancelled"):
+            record.update(
+                fields=fields, sequence=record["sequence"] + 1, last_modified=self.now
+            )
+            record.pop("cancelled", None)
+            self.stats["changed"] += 1
+        else:
+            self.stats["unchanged"] += 1
+        return EventVersion(record["sequence"], record["last_modified"])
+
+    def cancel_missing(
+        self, seen: Iterable[str], start: str, end: str
+    ) -> List[Tuple[Dict[str, str], EventVersion]]:
+        """start〜end（"YYYY-MM-DD"、両端含む）の記録済みイベントのうち seen にないものを取り消す。
+
+        初めて取り消すイベントは SEQUENCE を上げる。取り消し済みのものも含めて
+        (fields, EventVersion) を日付・UID順で返す（STATUS:CANCELLED として出力し続けるため）。
+        """
+        seen = set(seen)
+        cancelled = []
+        for uid in sorted(self.events, key=lambda uid: (self.events[uid]["fields"]["date"], uid)):
+            record = self.events[uid]
+            fields = record["fields"]
+            if uid in seen or not start <= fields["date"] <= end:
+                continue
+            if not record.get("cancelled"):
+                record.update(
+                    cancelled=True, sequence=record["sequence"] + 1, last_modified=self.now
+                )
+                self.stats["cancelled"] += 1
+            cancelled.append((fields, EventVersion(record["sequence"], record["last_modified"])))
+        return cancelled
+
+    def save(self) -> None:
+        """記録を書き出す（一時ファイル経由で置換）。"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        data = {"version": STATE_VERSION, "events": dict(sorted(self.events.items()))}
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    def summary(self) -> str:
+        return (
+            f"新規: {self.stats['new']}件 / 変更: {self.stats['changed']}件"
+            f" / 変更なし: {self.stats['unchanged']}件 / 取り消し: {self.stats['cancelled']}件"
+        )
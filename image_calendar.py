@@ -3,13 +3,16 @@ image_calendar.py — 月次カレンダー画像生成モジュール (1080x192
 """
 
 import calendar
-import os
-from collections import defaultdict
+import io
 from datetime import date, datetime
-from typing import Dict, List, Optional
+from typing import BinaryIO, Dict, List, Optional, Union
 
 from PIL import Image, ImageDraw, ImageFont
 
+from fonts import get_font
+from output_manifest import atomic_write
+from schedule_table import ScheduleTable
+
 CANVAS_W = 1080
 CANVAS_H = 1920
 SAFE_ZONE = 250
@@ -43,21 +46,8 @@ WEEKDAY_COLORS = [
     (60, 100, 200),  # 土 - 青
 ]
 
-FONT_PATHS = [
-    "/System/Library/Fonts/ヒラギノ角ゴシック W3.ttc",
-    "/System/Library/Fonts/ヒラギノ角ゴシック W4.ttc",
-    "/System/Library/Fonts/Supplemental/HiraginoSans.ttc",
-]
-
-
 def _get_font(size: int) -> ImageFont.FreeTypeFont:
-    for path in FONT_PATHS:
-        if os.path.exists(path):
-            return ImageFont.truetype(path, size)
-    noto_path = os.path.join(os.path.dirname(__file__), "fonts", "NotoSansJP-Regular.ttf")
-    if os.path.exists(noto_path):
-        return ImageFont.truetype(noto_path, size)
-    return ImageFont.load_default()
+    return get_font(size)
 
 
 def _text_size(draw: ImageDraw.ImageDraw, text: str, font: ImageFont.FreeTypeFont) -> tuple:
@@ -66,21 +56,16 @@ def _text_size(draw: ImageDraw.ImageDraw, text: str, font: ImageFont.FreeTypeFon
     return bbox[2] - bbox[0], bbox[3] - bbox[1]
 
 
-def generate_calendar_image(
-    schedule_data: Optional[List[Dict]] = None,
+def render_calendar_image(
+    schedule_data: Optional[Union[ScheduleTable, List[Dict]]] = None,
     month: str = "",
-    output_path: str = "",
-) -> str:
-    """月次カレンダー画像を生成する。
+) -> Image.Image:
+    """月次カレンダー画像を描画して返す。
 
     Args:
-        schedule_data: スケジュールデータのリスト。Noneの場合はdata_fetcher.fetch_schedule()で自動取得。
+        schedule_data: ScheduleTable またはスケジュールデータのリスト。Noneの場合はdata_fetcher.fetch_schedule()で自動取得。
             各dictのキー: date (YYYY-MM-DD), doctor_name, clinic_name
         month: "YYYY-MM" 形式の対象月。空の場合は今月。
-        output_path: 保存先パス (.png)
-
-    Returns:
-        output_path
     """
     if not month:
         month = date.today().strftime("%Y-%m")
@@ -92,13 +77,11 @@ def generate_calendar_image(
     dt = datetime.strptime(month, "%Y-%m")
     year, mon = dt.year, dt.month
 
-    # 日付 → 医師名リストのマップ構築
-    day_doctors: Dict[str, List[str]] = defaultdict(list)
-    for entry in schedule_data:
-        d = entry.get("date", "")
-        doctor = entry.get("doctor_name", "")
-        if d and doctor:
-            day_doctors[d].append(doctor)
+    # 日付別インデックスを持つテーブルに揃える（List[dict] も受け付ける）
+    if not isinstance(schedule_data, ScheduleTable):
+        schedule_data = ScheduleTable.from_dicts(
+            e for e in schedule_data if e.get("date") and e.get("doctor_name")
+        )
 
     # カレンダーグリッド (日曜始まり: firstweekday=6)
     cal = calendar.Calendar(firstweekday=6)
@@ -177,7 +160,7 @@ def generate_calendar_image(
                 continue
 
             date_str = f"{year}-{mon:02d}-{day:02d}"
-            doctors = day_doctors.get(date_str, [])
+            doctors = schedule_data.doctors_on(date_str)
 
             # セル背景色
             if col_idx == 0:      # 日曜
@@ -262,8 +245,45 @@ def generate_calendar_image(
                     fill=(110, 110, 120),
                 )
 
-    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
-    img.save(output_path, "PNG")
+    return img
+
+
+def calendar_image_png(
+    schedule_data: Optional[Union[ScheduleTable, List[Dict]]] = None,
+    month: str = "",
+    fp: Optional[BinaryIO] = None,
+) -> Optional[bytes]:
+    """月次カレンダー画像をPNGにエンコードする（ファイルには書き込まない）。
+
+    fp（書き込み可能なバイナリバッファ）を指定するとそこへ書き込んで None を返し、
+    省略時はPNGのバイト列を返す。
+    """
+    img = render_calendar_image(schedule_data, month)
+    if fp is not None:
+        img.save(fp, "PNG")
+        return None
+    buffer = io.BytesIO()
+    img.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def generate_calendar_image(
+    schedule_data: Optional[Union[ScheduleTable, List[Dict]]] = None,
+    month: str = "",
+    output_path: str = "",
+) -> str:
+    """月次カレンダー画像を生成する。
+
+    Args:
+        schedule_data: render_calendar_image() と同じ
+        month: "YYYY-MM" 形式の対象月。空の場合は今月。
+        output_path: 保存先パス (.png)
+
+    Returns:
+        output_path
+    """
+    with atomic_write(output_path) as f:
+        calendar_image_png(schedule_data, month, f)
     return output_path
 
 
@@ -5,11 +5,15 @@ image_poem.py — ポエム/名言画像生成モジュール
 
 from __future__ import annotations
 
-import os
+import io
 import textwrap
-from pathlib import Path
+from typing import BinaryIO, Optional
+
 from PIL import Image, ImageDraw, ImageFont
 
+from fonts import get_font
+from output_manifest import atomic_write
+
 # ============================================================
 # デフォルト名言リスト
 # ============================================================
@@ -51,29 +55,9 @@ COLOR_TEXT_MAIN = (255, 255, 255)  # 白
 COLOR_TEXT_AUTHOR = (180, 200, 240)  # 薄いブルーホワイト
 COLOR_ACCENT = (100, 150, 230)    # アクセントライン（淡ブルー）
 
-# フォントパス（優先順）
-FONT_PATHS = [
-    "/System/Library/Fonts/ヒラギノ角ゴシック W3.ttc",
-    "/System/Library/Fonts/ヒラギノ角ゴシック W4.ttc",
-    "/System/Library/Fonts/ヒラギノ角ゴシック W2.ttc",
-]
-
-# フォールバック用（Noto Sans JP）
-NOTO_FONT_PATHS = [
-    "fonts/NotoSansJP-Regular.ttf",
-    "fonts/NotoSansJP-Medium.ttf",
-]
-
-
 def _load_font(size: int) -> ImageFont.FreeTypeFont:
-    """日本語フォントをロード。見つからない場合はデフォルトフォント。"""
-    for path in FONT_PATHS + NOTO_FONT_PATHS:
-        if Path(path).exists():
-            try:
-                return ImageFont.truetype(path, size)
-            except Exception:
-                continue
-    return ImageFont.load_default()
+    """日本語フォントをロード（fonts.py の共有キャッシュ経由）。"""
+    return get_font(size)
 
 
 def _make_gradient_background(width: int, height: int) -> Image.Image:
@@ -114,21 +98,14 @@ def _wrap_text_japanese(text: str, font: ImageFont.FreeTypeFont, max_width: int)
     return lines
 
 
-def generate_poem_image(text: str, output_path: str, author: str = "") -> str:
+def render_poem_image(text: str, author: str = "") -> Image.Image:
     """
-    ポエム/名言画像を生成して output_path に保存する。
+    ポエム/名言画像を描画して返す。
 
     Args:
         text: 名言テキスト（\\n で改行可）
-        output_path: 出力先パス（例: "output/poem_20260301.png"）
         author: 著者名（省略可）
-
-    Returns:
-        output_path（保存されたファイルパス）
     """
-    # 出力ディレクトリを作成
-    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-
     # キャンバス生成
     img = _make_gradient_background(CANVAS_W, CANVAS_H)
     draw = ImageDraw.Draw(img)
@@ -198,7 +175,44 @@ def generate_poem_image(text: str, output_path: str, author: str = "") -> str:
         ay = line_y + accent_line_h + accent_gap
         draw.text((ax, ay), author_text, font=font_author, fill=COLOR_TEXT_AUTHOR)
 
-    img.save(output_path, "PNG")
+    return img
+
+
+def poem_image_png(text: str, author: str = "", fp: Optional[BinaryIO] = None) -> Optional[bytes]:
+    """
+    ポエム/名言画像をPNGにエンコードする（ファイルには書き込まない）。
+
+    Args:
+        text: 名言テキスト（\\n で改行可）
+        author: 著者名（省略可）
+        fp: 書き込み先のバイナリバッファ。省略時はPNGのバイト列を返す
+
+    Returns:
+        PNGのバイト列（fp 指定時は None）
+    """
+    img = render_poem_image(text, author)
+    if fp is not None:
+        img.save(fp, "PNG")
+        return None
+    buffer = io.BytesIO()
+    img.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def generate_poem_image(text: str, output_path: str, author: str = "") -> str:
+    """
+    ポエム/名言画像を生成して output_path に保存する。
+
+    Args:
+        text: 名言テキスト（\\n で改行可）
+        output_path: 出力先パス（例: "output/poem_20260301.png"）
+        author: 著者名（省略可）
+
+    Returns:
+        output_path（保存されたファイルパス）
+    """
+    with atomic_write(output_path) as f:
+        poem_image_png(text, author, f)
     return output_path
 
 
@@ -2,12 +2,16 @@
 image_schedule.py — 出勤情報ストーリー画像生成モジュール (1080x1920, 9:16)
 """
 
-import os
+import io
 from datetime import datetime
-from typing import Dict
+from functools import lru_cache
+from typing import BinaryIO, Dict, Optional
 
 from PIL import Image, ImageDraw, ImageFont
 
+from fonts import get_font
+from output_manifest import atomic_write
+
 CANVAS_W = 1080
 CANVAS_H = 1920
 SAFE_ZONE = 250  # 上下セーフゾーン px（Instagram UIオーバーレイ回避）
@@ -17,26 +21,11 @@ TEXT_COLOR = (30, 30, 40)
 ACCENT_COLOR = (30, 100, 200)
 SUB_COLOR = (100, 110, 130)
 
-FONT_PATHS = [
-    "/System/Library/Fonts/ヒラギノ角ゴシック W3.ttc",
-    "/System/Library/Fonts/ヒラギノ角ゴシック W4.ttc",
-    "/System/Library/Fonts/Supplemental/HiraginoSans.ttc",
-]
-
 WEEKDAYS_JP = ["月", "火", "水", "木", "金", "土", "日"]
 
 
 def _get_font(size: int) -> ImageFont.FreeTypeFont:
-    for path in FONT_PATHS:
-        if os.path.exists(path):
-            return ImageFont.truetype(path, size)
-
-    # フォールバック: fonts/配下のNoto Sans JP
-    noto_path = os.path.join(os.path.dirname(__file__), "fonts", "NotoSansJP-Regular.ttf")
-    if os.path.exists(noto_path):
-        return ImageFont.truetype(noto_path, size)
-
-    return ImageFont.load_default()
+    return get_font(size)
 
 
 def _draw_centered_text(
@@ -55,97 +44,145 @@ def _draw_centered_text(
     return text_h
 
 
-def generate_schedule_image(schedule_entry: Dict, output_path: str) -> str:
-    """出勤情報ストーリー画像を生成する。
+# レイアウト（各行のY座標はデータに依存しない固定値）
+MARGIN_X = 80
+BAR_H = 6
+CONTENT_TOP = SAFE_ZONE
+CONTENT_BOTTOM = CANVAS_H - SAFE_ZONE
+BLOCK_H_ESTIMATE = 520  # テキストブロックのおおよその合計高さ（縦中央揃え用）
+Y_DATE = CONTENT_TOP + (CONTENT_BOTTOM - CONTENT_TOP - BLOCK_H_ESTIMATE) // 2
+Y_DIVIDER = Y_DATE + 80 + 10
+Y_TODAY = Y_DATE + 130
+Y_DOCTOR = Y_TODAY + 72
+Y_CLINIC = Y_DOCTOR + 110
+Y_WORKING = Y_CLINIC + 90
+Y_TIME = Y_WORKING + 100
 
-    Args:
-        schedule_entry: date, doctor_name, clinic_name, start_time, end_time を持つdict
-        output_path: 保存先パス（.png）
+# 固定レイヤー（背景・アクセントライン・区切りライン・「本日」「出勤しています」）の版。
+# 固定レイヤーの見た目を変えたら上げること
+TEMPLATE_VERSION = 1
 
-    Returns:
-        output_path
-    """
-    img = Image.new("RGB", (CANVAS_W, CANVAS_H), BG_COLOR)
+
+def _draw_static_layers(img: Image.Image) -> None:
+    """全医師共通の固定レイヤーを描画する。"""
     draw = ImageDraw.Draw(img)
 
-    font_title = _get_font(52)
-    font_large = _get_font(76)
-    font_medium = _get_font(60)
-    font_small = _get_font(44)
-    font_date = _get_font(46)
+    # アクセントライン（上）
+    draw.rectangle(
+        [MARGIN_X, CONTENT_TOP + 50, CANVAS_W - MARGIN_X, CONTENT_TOP + 50 + BAR_H],
+        fill=ACCENT_COLOR,
+    )
 
-    content_top = SAFE_ZONE
-    content_bottom = CANVAS_H - SAFE_ZONE
-    content_h = content_bottom - content_top
+    # 区切りライン（細）
+    draw.rectangle(
+        [MARGIN_X + 120, Y_DIVIDER, CANVAS_W - MARGIN_X - 120, Y_DIVIDER + 2],
+        fill=(200, 210, 230),
+    )
 
-    # アクセントライン（上）
-    bar_h = 6
-    margin_x = 80
+    # 「本日」
+    _draw_centered_text(draw, "本日", Y_TODAY, _get_font(52), TEXT_COLOR)
+
+    # 「出勤しています」
+    _draw_centered_text(draw, "出勤しています", Y_WORKING, _get_font(60), TEXT_COLOR)
+
+    # アクセントライン（下）
     draw.rectangle(
-        [margin_x, content_top + 50, CANVAS_W - margin_x, content_top + 50 + bar_h],
+        [MARGIN_X, CONTENT_BOTTOM - 56, CANVAS_W - MARGIN_X, CONTENT_BOTTOM - 56 + BAR_H],
         fill=ACCENT_COLOR,
     )
 
+
+@lru_cache(maxsize=1)
+def _base_layer(template_version: int = TEMPLATE_VERSION) -> Image.Image:
+    """固定レイヤーをラスタライズしたベース画像（テンプレート版ごとに1回だけ生成）。"""
+    img = Image.new("RGB", (CANVAS_W, CANVAS_H), BG_COLOR)
+    _draw_static_layers(img)
+    return img
+
+
+def warm_template() -> None:
+    """ベース画像（と固定レイヤーのフォント）を先に生成しておく。
+
+    一括生成のワーカー起動時などに呼ぶと、最初の1枚の描画時間にテンプレート生成が含まれない。
+    """
+    _base_layer()
+
+
+def _draw_variable_layers(img: Image.Image, schedule_entry: Dict) -> None:
+    """日付・医師名・クリニック名・勤務時間を描画する。"""
+    draw = ImageDraw.Draw(img)
+
     # 日付表示
     date_str = schedule_entry.get("date", "")
     if date_str:
         dt = datetime.strptime(date_str, "%Y-%m-%d")
         weekday = WEEKDAYS_JP[dt.weekday()]
         date_display = f"{dt.year}年{dt.month}月{dt.day}日（{weekday}）"
-    else:
-        date_display = ""
+        _draw_centered_text(draw, date_display, Y_DATE, _get_font(46), SUB_COLOR)
 
     doctor_name = schedule_entry.get("doctor_name", "")
     clinic_name = schedule_entry.get("clinic_name", "")
     start_time = schedule_entry.get("start_time", "")
     end_time = schedule_entry.get("end_time", "")
 
-    # コンテンツ縦中央をベースに配置
-    # テキストブロック合計高さを推定して縦中央に揃える
-    block_h_estimate = 520  # おおよその合計高さ
-    y = content_top + (content_h - block_h_estimate) // 2
-
-    # 日付
-    if date_display:
-        _draw_centered_text(draw, date_display, y, font_date, SUB_COLOR)
-    y += 80
-
-    # 区切りライン（細）
-    line_y = y + 10
-    draw.rectangle(
-        [margin_x + 120, line_y, CANVAS_W - margin_x - 120, line_y + 2],
-        fill=(200, 210, 230),
-    )
-    y += 50
-
-    # 「本日」
-    _draw_centered_text(draw, "本日", y, font_title, TEXT_COLOR)
-    y += 72
-
     # 「○○先生は」（強調色）
-    _draw_centered_text(draw, f"{doctor_name}先生は", y, font_large, ACCENT_COLOR)
-    y += 110
+    _draw_centered_text(draw, f"{doctor_name}先生は", Y_DOCTOR, _get_font(76), ACCENT_COLOR)
 
     # 「△△に」
-    _draw_centered_text(draw, f"{clinic_name}に", y, font_medium, TEXT_COLOR)
-    y += 90
-
-    # 「出勤しています」
-    _draw_centered_text(draw, "出勤しています", y, font_medium, TEXT_COLOR)
-    y += 100
+    _draw_centered_text(draw, f"{clinic_name}に", Y_CLINIC, _get_font(60), TEXT_COLOR)
 
     # 勤務時間（データがあれば）
     if start_time and end_time:
         time_text = f"勤務時間　{start_time} 〜 {end_time}"
-        _draw_centered_text(draw, time_text, y, font_small, SUB_COLOR)
-        y += 60
+        _draw_centered_text(draw, time_text, Y_TIME, _get_font(44), SUB_COLOR)
 
-    # アクセントライン（下）
-    draw.rectangle(
-        [margin_x, content_bottom - 56, CANVAS_W - margin_x, content_bottom - 56 + bar_h],
-        fill=ACCENT_COLOR,
-    )
 
-    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
-    img.save(output_path, "PNG")
+def render_schedule_image(schedule_entry: Dict, use_template: bool = True) -> Image.Image:
+    """出勤情報ストーリー画像を描画して返す。
+
+    use_template=True の場合は固定レイヤーのベース画像をコピーして可変テキストだけを描画する。
+    False の場合は従来どおり全レイヤーを毎回描画する（比較・ベンチマーク用）。
+    """
+    if use_template:
+        img = _base_layer().copy()
+    else:
+        img = Image.new("RGB", (CANVAS_W, CANVAS_H), BG_COLOR)
+        _draw_static_layers(img)
+    _draw_variable_layers(img, schedule_entry)
+    return img
+
+
+def schedule_image_png(
+    schedule_entry: Dict, fp: Optional[BinaryIO] = None
+) -> Optional[bytes]:
+    """出勤情報ストーリー画像をPNGにエンコードする（ファイルには書き込まない）。
+
+    Args:
+        schedule_entry: date, doctor_name, clinic_name, start_time, end_time を持つdict
+        fp: 書き込み先のバイナリバッファ。省略時はPNGのバイト列を返す
+
+    Returns:
+        PNGのバイト列（fp 指定時は None）
+    """
+    img = render_schedule_image(schedule_entry)
+    if fp is not None:
+        img.save(fp, "PNG")
+        return None
+    buffer = io.BytesIO()
+    img.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def generate_schedule_image(schedule_entry: Dict, output_path: str) -> str:
+    """出勤情報ストーリー画像を生成する。
+
+    Args:
+        schedule_entry: date, doctor_name, clinic_name, start_time, end_time を持つdict
+        output_path: 保存先パス（.png）
+
+    Returns:
+        output_path
+    """
+    with atomic_write(output_path) as f:
+        schedule_image_png(schedule_entry, f)
     return output_path
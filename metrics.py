@@ -0,0 +1,247 @@
+"""
+metrics.py — generate.py --profile の計測
+
+ステージ（取得・解析・各生成タイプ）ごとの実時間・CPU時間と、出力ファイルごとの
+時間・バイト数・内訳（描画・PNGエンコード・書き込み）を記録し、JSONと表で出力する。
+指定したステージは cProfile または tracemalloc で詳細に記録できる。
+
+計測は profiler.enable() 後だけ有効で、無効時の stage() / record_output() は何もしない。
+CPU時間はスレッド単位（time.thread_time）で測るため、並行実行中のステージ同士は混ざらない。
+"""
+
+import io
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+CAPTURE_KINDS = ("cprofile", "tracemalloc")
+# 表示する上位件数（遅い出力・cProfile の関数・tracemalloc の確保箇所）
+TOP_N = 10
+
+
+def _cpu_total() -> float:
+    """自プロセス + 終了済み子プロセス（--jobs のワーカー）のCPU時間。"""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+class Profiler:
+    """ステージ・出力ごとの計測結果を集める。"""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.capture_kind: Optional[str] = None
+        self.capture_stage: Optional[str] = None
+        self.json_path = ""
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.outputs: List[Dict[str, Any]] = []
+        self.captures: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._started = (0.0, 0.0)
+        self._started_at = ""
+
+    def enable(
+        self,
+        json_path: str,
+        capture_kind: Optional[str] = None,
+        capture_stage: Optional[str] = None,
+    ) -> None:
+        """計測を開始する。capture_kind を指定すると capture_stage を詳細に記録する。"""
+        self.enabled = True
+        self.json_path = json_path
+        self.capture_kind = capture_kind
+        self.capture_stage = capture_stage
+        self._started = (time.perf_counter(), _cpu_total())
+        self._started_at = datetime.now().isoformat(timespec="seconds")
+
+    def _stage(self, name: str) -> Dict[str, float]:
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = {"wall": 0.0, "cpu": 0.0, "calls": 0}
+        return stage
+
+    def add_time(self, name: str, wall: float, cpu: float) -> None:
+        with self._lock:
+            stage = self._stage(name)
+            stage["wall"] += wall
+            stage["cpu"] += cpu
+            stage["calls"] += 1
+
+    def count(self, name: str, **counters: float) -> None:
+        """ステージに件数・バイト数・キャッシュヒット数などを加算する。"""
+        if not self.enabled:
+            return
+        with self._lock:
+            stage = self._stage(name)
+            for key, value in counters.items():
+                stage[key] = stage.get(key, 0) + value
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """ブロックの実時間・CPU時間をステージ name に加算する。"""
+        if not self.enabled:
+            yield
+            return
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            with self._capture(name):
+                yield
+        finally:
+            self.add_time(name, time.perf_counter() - wall, time.thread_time() - cpu)
+
+    def record_output(
+        self,
+        stage: str,
+        path: str,
+        wall: float,
+        cpu: float,
+        phases: Optional[Dict[str, Tuple[float, float]]] = None,
+    ) -> None:
+        """出力ファイル1件の計測結果を記録する。
+
+        phases は {"render": (実時間, CPU時間), ...} の内訳で、"<stage>.<phase>" にも加算する。
+        """
+        if not self.enabled:
+            return
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        self.count(stage, items=1, bytes=size)
+        for phase, (phase_wall, phase_cpu) in (phases or {}).items():
+            self.add_time(f"{stage}.{phase}", phase_wall, phase_cpu)
+        with self._lock:
+            self.outputs.append(
+                {
+                    "stage": stage,
+                    "path": path,
+                    "bytes": size,
+                    "wall": wall,
+                    "cpu": cpu,
+                    "phases": {name: list(value) for name, value in (phases or {}).items()},
+                }
+            )
+
+    @contextmanager
+    def output(self, stage: str, path: str) -> Iterator[None]:
+        """出力ファイル1件を生成するブロックを計測する（内訳なし）。"""
+        if not self.enabled:
+            yield
+            return
+        wall, cpu = time.perf_counter(), time.thread_time()
+        yield
+        self.record_output(stage, path, time.perf_counter() - wall, time.thread_time() - cpu)
+
+    @contextmanager
+    def _capture(self, name: str) -> Iterator[None]:
+        """capture_stage のステージだけを cProfile / tracemalloc で記録する。"""
+        if self.capture_kind is None or name != self.capture_stage:
+            yield
+            return
+
+        base = os.path.splitext(self.json_path)[0]
+        if self.capture_kind == "cprofile":
+            import cProfile
+            import pstats
+
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                yield
+            finally:
+                profile.disable()
+                prof_path = f"{base}_{name}.prof"
+                profile.dump_stats(prof_path)
+                stream = io.StringIO()
+                pstats.Stats(profile, stream=stream).sort_stats("cumulative").print_stats(TOP_N)
+                self.captures[name] = {
+                    "kind": "cprofile",
+                    "path": prof_path,
+                    "report": stream.getvalue(),
+                }
+            return
+
+        tracemalloc.start()
+        try:
+            yield
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            top = snapshot.statistics("lineno")[:TOP_N]
+            self.captures[name] = {
+                "kind": "tracemalloc",
+                "current_bytes": current,
+                "peak_bytes": peak,
+                "top": [
+                    {"location": str(stat.traceback), "bytes": stat.size, "count": stat.count}
+                    for stat in top
+                ],
+            }
+
+    def to_dict(self) -> Dict[str, Any]:
+        wall, cpu = self._started
+        return {
+            "started_at": self._started_at,
+            "wall": time.perf_counter() - wall,
+            "cpu": _cpu_total() - cpu,
+            "stages": self.stages,
+            "outputs": self.outputs,
+            "captures": self.captures,
+        }
+
+    def write_json(self) -> str:
+        """計測結果を json_path に書き出す。"""
+        directory = os.path.dirname(os.path.abspath(self.json_path))
+        os.makedirs(directory, exist_ok=True)
+        with open(self.json_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=1)
+        return self.json_path
+
+    def summary(self) -> str:
+        """ステージ別の集計表と、時間のかかった出力の一覧を返す。"""
+        data = self.to_dict()
+        lines = [
+            f"{'ステージ':<22} {'実時間':>10} {'CPU':>10} {'件数':>6} {'バイト':>12}  その他",
+        ]
+        for name in sorted(self.stages):
+            stage = self.stages[name]
+            extra = ", ".join(
+                f"{key}={value:g}"
+                for key, value in stage.items()
+                if key not in ("wall", "cpu", "calls", "items", "bytes")
+            )
+            label = f"  {name}" if "." in name else name
+            lines.append(
+                f"{label:<22} {stage['wall'] * 1000:8.1f}ms {stage['cpu'] * 1000:8.1f}ms"
+                f" {int(stage.get('items', 0)):6d} {int(stage.get('bytes', 0)):12d}  {extra}"
+            )
+        lines.append(
+            f"{'合計':<22} {data['wall'] * 1000:8.1f}ms {data['cpu'] * 1000:8.1f}ms"
+        )
+
+        slowest = sorted(self.outputs, key=lambda output: output["wall"], reverse=True)[:5]
+        if slowest:
+            lines.append("時間のかかった出力:")
+            lines.extend(
+                f"  {output['wall'] * 1000:8.1f}ms  {output['path']}" for output in slowest
+            )
+        for name, capture in self.captures.items():
+            if capture["kind"] == "cprofile":
+                lines.append(f"cProfile（{name}）: {capture['path']}")
+                lines.append(capture["report"].rstrip())
+            else:
+                lines.append(
+                    f"tracemalloc（{name}）: ピーク {capture['peak_bytes']}バイト"
+                )
+                lines.extend(
+                    f"  {top['bytes']:10d}B {top['count']:6d}回  {top['location']}"
+                    for top in capture["top"]
+                )
+        return "\n".join(lines)
+
+
+# プロセス内で共有するプロファイラ（generate.py --profile で有効化）
+profiler = Profiler()
@@ -0,0 +1,140 @@
+"""
+output_manifest.py — 出力ディレクトリの生成済みファイル管理
+
+出力ディレクトリの .manifest.json に、各出力ファイルの入力ハッシュ
+（エントリのフィールド + テンプレート版・フォント等の描画設定）を記録する。
+次回以降はハッシュが変わった出力だけを生成し、シフトが消えた出力は削除する。
+同期・アップロード側は変更のあったファイルだけを扱える。
+"""
+
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List
+
+MANIFEST_NAME = ".manifest.json"
+MANIFEST_VERSION = 1
+
+
+@contextmanager
+def atomic_write(path: str) -> Iterator[BinaryIO]:
+    """path.tmp に書き込み、正常に終わったら path と置換する（バイナリ）。
+
+    途中で例外が起きた場合は一時ファイルを消して既存の path をそのまま残すため、
+    描画エラーで空のファイルが残ったり、配信中に書きかけのファイルが読まれたりしない。
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def input_hash(kind: str, inputs: Any, settings: Dict[str, Any]) -> str:
+    """出力の入力（エントリ・描画設定）から決定的なハッシュを計算する。"""
+    payload = json.dumps(
+        {"kind": kind, "inputs": inputs, "settings": settings},
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class OutputManifest:
+    """出力ディレクトリ内のファイル名 → {kind, group, hash} の記録。
+
+    group は削除判定の単位（schedule なら日付 "YYYY-MM-DD"、calendar/ical なら対象月・期間）。
+    stats に created・skipped・removed の件数を数える。
+    generate.py --type all では複数ステージのスレッドから共有される。
+    """
+
+    def __init__(self, output_dir: str, force: bool = False) -> None:
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        self.force = force
+        self.entries: Dict[str, Dict[str, str]] = {}
+        self.stats = {"created": 0, "skipped": 0, "removed": 0}
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == MANIFEST_VERSION:
+            self.entries = data.get("files", {})
+
+    def is_current(self, out_path: str, digest: str) -> bool:
+        """前回と同じ入力で生成済みなら True（件数を skipped に数える）。"""
+        name = os.path.relpath(out_path, self.output_dir)
+        with self._lock:
+            record = self.entries.get(name)
+            if (
+                self.force
+                or record is None
+                or record["hash"] != digest
+                or not os.path.exists(out_path)
+            ):
+                return False
+            self.stats["skipped"] += 1
+            return True
+
+    def record(self, out_path: str, kind: str, group: str, digest: str) -> None:
+        """生成した出力を記録する（件数を created に数える）。"""
+        name = os.path.relpath(out_path, self.output_dir)
+        with self._lock:
+            self.entries[name] = {"kind": kind, "group": group, "hash": digest}
+            self.stats["created"] += 1
+
+    def remove_stale(
+        self, kind: str, in_scope: Callable[[str], bool], keep: Iterable[str]
+    ) -> List[str]:
+        """今回の対象範囲（in_scope(group) が真）にあり keep に含まれない出力を削除する。
+
+        Returns:
+            削除した出力のパス
+        """
+        keep_names = {os.path.relpath(path, self.output_dir) for path in keep}
+        with self._lock:
+            stale = [
+                name
+                for name, record in self.entries.items()
+                if record["kind"] == kind and name not in keep_names and in_scope(record["group"])
+            ]
+            for name in stale:
+                del self.entries[name]
+            self.stats["removed"] += len(stale)
+        removed = []
+        for name in stale:
+            path = os.path.join(self.output_dir, name)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            removed.append(path)
+        return removed
+
+    def save(self) -> None:
+        """マニフェストを書き出す（一時ファイル経由で置換）。"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        with self._lock:
+            data = {"version": MANIFEST_VERSION, "files": dict(sorted(self.entries.items()))}
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def summary(self) -> str:
+        return (
+            f"生成: {self.stats['created']}件 / スキップ（変更なし）: {self.stats['skipped']}件"
+            f" / 削除: {self.stats['removed']}件"
+        )
@@ -0,0 +1,206 @@
+"""
+request_scheduler.py — Sheets/Drive API リクエストのスロットリング・リトライ
+
+全リクエストを1つのトークンバケットで読み取りクォータ内に収め、
+429・5xx・通信エラーはジッター付き指数バックオフで再試行する。
+同じGETリクエストが同時に発行された場合は1回の通信結果を共有する（コアレッシング）。
+
+data_fetcher.get_client() が ScheduledHTTPClient を使うため、
+generate.py・scripts/fetch_sheets.py の全リクエストがこのスケジューラを通る。
+"""
+
+import json
+import random
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import requests
+from gspread.http_client import HTTPClient
+
+# Sheets API の読み取りクォータ（1ユーザーあたり/分）
+READ_QUOTA_PER_MINUTE = 60
+# バースト許容量。補充レートは (クォータ - バースト) / 60秒 とし、
+# どの60秒間でもバースト + 補充分がクォータを超えないようにする
+BURST = 10
+
+# 再試行するHTTPステータス
+RETRY_STATUS = {408, 429, 500, 502, 503, 504}
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0  # 秒
+BACKOFF_MAX = 32.0  # 秒
+
+
+class TokenBucket:
+    """スレッドセーフなトークンバケット。"""
+
+    def __init__(
+        self,
+        capacity: float,
+        refill_per_second: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._tokens = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """トークンを1つ取得する。待機した秒数を返す。"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.refill_per_second
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                wait = (1 - self._tokens) / self.refill_per_second
+            self._sleep(wait)
+            waited += wait
+
+
+def _status_of(error: BaseException) -> Optional[int]:
+    """例外からHTTPステータスを取り出す（gspread.APIError / requests.HTTPError）。"""
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None)
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    """Retry-After ヘッダ（秒）があれば返す。"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After", ""))
+    except ValueError:
+        return None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """再試行すべきエラー（429・5xx・タイムアウト・接続エラー）かどうか。"""
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    return _status_of(error) in RETRY_STATUS
+
+
+class RequestScheduler:
+    """トークンバケット・リトライ・コアレッシングを行うリクエストスケジューラ。
+
+    stats に requests（実際の送信回数）・retries・coalesced（共有した回数）・
+    failures・throttled_seconds（バケット待ち + バックオフの合計秒）を記録する。
+    """
+
+    def __init__(
+        self,
+        quota_per_minute: int = READ_QUOTA_PER_MINUTE,
+        burst: int = BURST,
+        max_retries: int = MAX_RETRIES,
+        backoff_base: float = BACKOFF_BASE,
+        backoff_max: float = BACKOFF_MAX,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.bucket = TokenBucket(burst, (quota_per_minute - burst) / 60.0, clock, sleep)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._sleep = sleep
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Any] = {}
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.stats.update(
+            requests=0, retries=0, coalesced=0, failures=0, throttled_seconds=0.0
+        )
+
+    def _count(self, name: str, value: Any = 1) -> None:
+        with self._lock:
+            self.stats[name] += value
+
+    def _backoff(self, attempt: int, error: BaseException) -> float:
+        """フルジッター付き指数バックオフ。Retry-After があればそれ以上待つ。"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def _run(self, func: Callable[[], Any]) -> Any:
+        attempt = 0
+        while True:
+            self._count("throttled_seconds", self.bucket.acquire())
+            self._count("requests")
+            try:
+                return func()
+            except Exception as error:
+                if attempt >= self.max_retries or not is_retryable(error):
+                    self._count("failures")
+                    raise
+                delay = self._backoff(attempt, error)
+                self._count("retries")
+                self._count("throttled_seconds", delay)
+                self._sleep(delay)
+                attempt += 1
+
+    def execute(self, func: Callable[[], Any], key: Optional[Hashable] = None) -> Any:
+        """func をスケジューラ経由で実行する。
+
+        key を指定すると、同じ key の実行中リクエストがある場合はその結果を共有する。
+        """
+        if key is None:
+            return self._run(func)
+
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+            else:
+                self.stats["coalesced"] += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            result = self._run(func)
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+
+# プロセス内で共有するスケジューラ
+scheduler = RequestScheduler()
+
+
+class ScheduledHTTPClient(HTTPClient):
+    """全リクエストを共有スケジューラ経由で送る gspread の HTTPClient。
+
+    gspread.authorize(creds, http_client=ScheduledHTTPClient) で使う。
+    GETリクエストは (URL, パラメータ) が同じなら同時実行分をコアレッシングする。
+    """
+
+    def request(self, method: str, endpoint: str, *args: Any, **kwargs: Any) -> requests.Response:
+        key = None
+        if method.lower() == "get" and not args:
+            params = json.dumps(kwargs.get("params"), sort_keys=True, default=str)
+            key = (endpoint, params)
+        return scheduler.execute(
+            lambda: super(ScheduledHTTPClient, self).request(method, endpoint, *args, **kwargs),
+            key=key,
+        )
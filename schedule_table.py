@@ -0,0 +1,229 @@
+"""
+schedule_table.py — シフトデータを列指向で保持するテーブル
+
+医師名・クリニック名・時刻は文字列テーブルにインターンし、各シフトは
+日付序数（date.toordinal()）とIDの配列として保持する。
+日付・医師・クリニック別のインデックスは追加時に構築済みのため、検索はO(1)。
+"""
+
+from array import array
+from datetime import date
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+
+class ScheduleTable:
+    """シフトの列指向テーブル。
+
+    イテレーション・インデックスアクセスでは従来と同じ
+    date, doctor_name, clinic_name, start_time, end_time を持つdictを返す。
+    """
+
+    def __init__(self) -> None:
+        # インターン済み文字列テーブル（ID → 文字列）と逆引き
+        self._strings: List[str] = [""]
+        self._string_ids: Dict[str, int] = {"": 0}
+
+        # 列（行番号で対応）
+        self._days = array("l")
+        self._doctors = array("H")
+        self._clinics = array("H")
+        self._starts = array("H")
+        self._ends = array("H")
+
+        # インデックス: キー → 行番号配列
+        self._by_day: Dict[int, array] = {}
+        self._by_doctor: Dict[int, array] = {}
+        self._by_clinic: Dict[int, array] = {}
+
+        # 医師名 → 所属グループ（シート col A）
+        self.doctor_groups: Dict[str, str] = {}
+
+    @classmethod
+    def from_dicts(cls, entries: Iterable[Dict[str, Any]]) -> "ScheduleTable":
+        """従来形式のdictリストからテーブルを構築する。"""
+        table = cls()
+        for entry in entries:
+            table.append(
+                entry["date"],
+                entry.get("doctor_name", ""),
+                entry.get("clinic_name", ""),
+                entry.get("start_time", ""),
+                entry.get("end_time", ""),
+            )
+        return table
+
+    def _intern(self, value: str) -> int:
+        string_id = self._string_ids.get(value)
+        if string_id is None:
+            string_id = len(self._strings)
+            self._strings.append(value)
+            self._string_ids[value] = string_id
+        return string_id
+
+    def append(
+        self,
+        day: Any,
+        doctor_name: str,
+        clinic_name: str,
+        start_time: str = "",
+        end_time: str = "",
+    ) -> None:
+        """シフトを1件追加する。day は 日付序数・"YYYY-MM-DD"・date のいずれか。"""
+        if isinstance(day, int):
+            ordinal = day
+        elif isinstance(day, str):
+            ordinal = date.fromisoformat(day).toordinal()
+        else:
+            ordinal = day.toordinal()
+
+        self._append_ids(
+            ordinal,
+            self._intern(doctor_name),
+            self._intern(clinic_name),
+            self._intern(start_time),
+            self._intern(end_time),
+        )
+
+    def _append_ids(
+        self, ordinal: int, doctor_id: int, clinic_id: int, start_id: int, end_id: int
+    ) -> None:
+        row = len(self._days)
+        self._days.append(ordinal)
+        self._doctors.append(doctor_id)
+        self._clinics.append(clinic_id)
+        self._starts.append(start_id)
+        self._ends.append(end_id)
+
+        # setdefault(key, array("I")) だと毎回配列を生成するため get で分岐する
+        rows = self._by_day.get(ordinal)
+        if rows is None:
+            rows = self._by_day[ordinal] = array("I")
+        rows.append(row)
+        rows = self._by_doctor.get(doctor_id)
+        if rows is None:
+            rows = self._by_doctor[doctor_id] = array("I")
+        rows.append(row)
+        rows = self._by_clinic.get(clinic_id)
+        if rows is None:
+            rows = self._by_clinic[clinic_id] = array("I")
+        rows.append(row)
+
+    def extend(self, other: "ScheduleTable") -> None:
+        """別テーブルの全行を末尾に追加する。"""
+        for row in range(len(other)):
+            self.append(*other.row_tuple(row))
+        self.doctor_groups.update(other.doctor_groups)
+
+    def __len__(self) -> int:
+        return len(self._days)
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        for row in range(len(self._days)):
+            yield self.row(row)
+
+    def __getitem__(self, row: int) -> Dict[str, str]:
+        return self.row(range(len(self._days))[row])
+
+    def row_tuple(self, row: int) -> Tuple[int, str, str, str, str]:
+        """(日付序数, doctor_name, clinic_name, start_time, end_time) を返す。"""
+        strings = self._strings
+        return (
+            self._days[row],
+            strings[self._doctors[row]],
+            strings[self._clinics[row]],
+            strings[self._starts[row]],
+            strings[self._ends[row]],
+        )
+
+    def row(self, row: int) -> Dict[str, str]:
+        """従来形式のdictとして1行を返す。"""
+        ordinal, doctor_name, clinic_name, start_time, end_time = self.row_tuple(row)
+        return {
+            "date": date.fromordinal(ordinal).isoformat(),
+            "doctor_name": doctor_name,
+            "clinic_name": clinic_name,
+            "start_time": start_time,
+            "end_time": end_time,
+        }
+
+    def to_dicts(
+        self, default_start_time: str = "", default_end_time: str = ""
+    ) -> List[Dict[str, str]]:
+        """従来形式のdictリストに変換する（互換用）。
+
+        default_start_time / default_end_time を指定すると、空の時刻をその値で補完する。
+        """
+        results = []
+        for entry in self:
+            if not entry["start_time"]:
+                entry["start_time"] = default_start_time
+            if not entry["end_time"]:
+                entry["end_time"] = default_end_time
+            results.append(entry)
+        return results
+
+    def _select(self, rows: Iterable[int]) -> "ScheduleTable":
+        """指定行だけを持つテーブルを返す（文字列テーブルは共有する）。"""
+        table = ScheduleTable()
+        table._strings = self._strings
+        table._string_ids = self._string_ids
+        table.doctor_groups = self.doctor_groups
+        for row in rows:
+            table._append_ids(
+                self._days[row],
+                self._doctors[row],
+                self._clinics[row],
+                self._starts[row],
+                self._ends[row],
+            )
+        return table
+
+    def for_date(self, date_str: str) -> "ScheduleTable":
+        """指定日 "YYYY-MM-DD" のシフトだけを持つテーブルを返す。"""
+        ordinal = date.fromisoformat(date_str).toordinal()
+        return self._select(self._by_day.get(ordinal, ()))
+
+    def for_month(self, month: str) -> "ScheduleTable":
+        """指定月 "YYYY-MM" のシフトだけを持つテーブルを返す。"""
+        first = date.fromisoformat(f"{month}-01")
+        next_first = date(first.year + first.month // 12, first.month % 12 + 1, 1)
+        rows: List[int] = []
+        for ordinal in range(first.toordinal(), next_first.toordinal()):
+            rows.extend(self._by_day.get(ordinal, ()))
+        return self._select(rows)
+
+    def for_doctor(self, doctor_name: str) -> "ScheduleTable":
+        """指定医師のシフトだけを持つテーブルを返す。"""
+        doctor_id = self._string_ids.get(doctor_name)
+        return self._select(self._by_doctor.get(doctor_id, ()) if doctor_id else ())
+
+    def for_clinic(self, clinic_name: str) -> "ScheduleTable":
+        """指定クリニックのシフトだけを持つテーブルを返す。"""
+        clinic_id = self._string_ids.get(clinic_name)
+        return self._select(self._by_clinic.get(clinic_id, ()) if clinic_id else ())
+
+    def doctors_on(self, date_str: str) -> List[str]:
+        """指定日に出勤する医師名のリストを返す。"""
+        ordinal = date.fromisoformat(date_str).toordinal()
+        return [self._strings[self._doctors[row]] for row in self._by_day.get(ordinal, ())]
+
+    def dates(self) -> List[str]:
+        """シフトのある日付 "YYYY-MM-DD" を昇順で返す。"""
+        return [date.fromordinal(ordinal).isoformat() for ordinal in sorted(self._by_day)]
+
+    def doctor_names(self) -> List[str]:
+        """シフトのある医師名を登場順で返す。"""
+        return [self._strings[doctor_id] for doctor_id in self._by_doctor]
+
+    def clinic_names(self) -> List[str]:
+        """シフトのあるクリニック名を登場順で返す。"""
+        return [self._strings[clinic_id] for clinic_id in self._by_clinic]
+
+    def sorted(self) -> "ScheduleTable":
+        """日付→医師名順に並べ替えたテーブルを返す。"""
+        strings = self._strings
+        order = sorted(
+            range(len(self._days)),
+            key=lambda row: (self._days[row], strings[self._doctors[row]]),
+        )
+        return self._select(order)
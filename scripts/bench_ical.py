@@ -0,0 +1,131 @@
+"""
+bench_ical.py — iCalendar 書き出しのベンチマーク
+合成シート（scripts/synthetic_grid.py）から大量のシフトを作り、
+icalendar の Calendar を組み立てて to_ical() する方法と
+ical_generator.write_ical() のストリーミング書き出しを比較する。
+DTSTAMP を固定して両者の出力がバイト単位で一致することも確認する。
+あわせて全体・医師別・クリニック別フィードの一括書き出し（write_ical_feeds）も計測する。
+
+使用例:
+    python scripts/bench_ical.py                          # 80人 x 24ヶ月（約3万件）
+    python scripts/bench_ical.py --doctors 40 --months 12 --repeat 5
+"""
+
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from data_fetcher import schedule_from_values  # noqa: E402
+from ical_generator import (  # noqa: E402
+    FEED_ALL,
+    JST,
+    build_calendar,
+    write_ical,
+    write_ical_feeds,
+)
+from synthetic_grid import make_grids  # noqa: E402
+
+DTSTAMP = datetime(2026, 1, 1, 9, 0, tzinfo=JST)
+
+
+def _calendar_tree(entries):
+    return build_calendar(entries, DTSTAMP).to_ical()
+
+
+def _streaming(entries):
+    buffer = io.BytesIO()
+    write_ical(iter(entries), buffer, DTSTAMP)
+    return buffer.getvalue()
+
+
+def _fan_out(entries, workdir):
+    feeds = write_ical_feeds(
+        iter(entries),
+        lambda kind, name: os.path.join(workdir, f"{kind}_{name}.ics"),
+        DTSTAMP,
+    )
+    with open(feeds[FEED_ALL][0], "rb") as f:
+        return f.read()
+
+
+def _single_file(entries, workdir):
+    with open(os.path.join(workdir, "single.ics"), "wb") as f:
+        write_ical(iter(entries), f, DTSTAMP)
+
+
+def _bench(label, func, entries, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        data = func(entries)
+        best = min(best, time.perf_counter() - t0)
+
+    tracemalloc.start()
+    func(entries)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    per_event = best / len(entries) * 1e6 if entries else 0.0
+    print(
+        f"{label:<12} {best * 1000:9.1f} ms  ({per_event:.1f} µs/件)"
+        f"  ピークメモリ {peak / 1024 / 1024:7.1f} MiB"
+    )
+    return best, data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="iCalendar 書き出しのベンチマーク")
+    parser.add_argument("--doctors", type=int, default=80)
+    parser.add_argument("--clinics", type=int, default=7)
+    parser.add_argument("--from", dest="from_month", default="2024-07")
+    parser.add_argument("--months", type=int, default=24)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    grids = make_grids(
+        args.from_month,
+        args.months,
+        doctors=args.doctors,
+        clinics=args.clinics,
+        annotation_density=0.3,
+    )
+    entries = schedule_from_values(grids).to_dicts(
+        default_start_time="09:00", default_end_time="18:00"
+    )
+    print(f"イベント数: {len(entries)}（{args.doctors}人 x {args.months}ヶ月）")
+
+    tree_time, tree_data = _bench("icalendar", _calendar_tree, entries, args.repeat)
+    stream_time, stream_data = _bench("streaming", _streaming, entries, args.repeat)
+
+    if tree_data != stream_data:
+        print("出力が一致しません", file=sys.stderr)
+        sys.exit(1)
+    print(f"出力一致: {len(stream_data)} バイト  速度比 {tree_time / stream_time:.1f}x")
+
+    feed_count = 1 + sum(
+        len({entry[field] for entry in entries if entry.get(field)})
+        for field in ("doctor_name", "clinic_name")
+    )
+    with tempfile.TemporaryDirectory() as workdir:
+        single_time, _ = _bench(
+            "1ファイル", lambda items: _single_file(items, workdir), entries, args.repeat
+        )
+        fan_out_time, combined = _bench(
+            f"{feed_count}フィード", lambda items: _fan_out(items, workdir), entries, args.repeat
+        )
+    if combined != stream_data:
+        print("全体フィードの出力が一致しません", file=sys.stderr)
+        sys.exit(1)
+    print(f"全体フィード一致  1ファイル比 {fan_out_time / single_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
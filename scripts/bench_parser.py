@@ -0,0 +1,100 @@
+"""
+bench_parser.py — シートグリッド解析のベンチマーク
+保存済みスナップショット（cache/）を使い、data_fetcher の1パス解析と
+従来のセル単位ループ（strip + SKIP_VALUES/CLINIC_MAP 判定）を比較する。
+
+使用例:
+    python generate.py --type ical --from 2024-07 --to 2026-05   # スナップショット取得
+    python scripts/bench_parser.py --from 2024-07 --to 2026-05
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import data_fetcher  # noqa: E402
+from data_fetcher import CLINIC_MAP, SKIP_VALUES, month_range  # noqa: E402
+
+
+def _legacy_parse(all_values, year, mon):
+    """1パス解析導入前の fetch_schedule の行ループ（比較用）。"""
+    if len(all_values) < 5:
+        return []
+    date_row = all_values[2]
+    date_col_map = {}
+    for col_idx in range(2, len(date_row)):
+        cell_val = date_row[col_idx].strip()
+        if cell_val.isdigit():
+            try:
+                date_col_map[col_idx] = date(year, mon, int(cell_val))
+            except ValueError:
+                pass
+
+    results = []
+    for row in all_values[4:]:
+        if not any(cell.strip() for cell in row):
+            continue
+        doctor_name = row[1].strip() if len(row) > 1 else ""
+        if not doctor_name:
+            continue
+        for col_idx, shift_date in date_col_map.items():
+            if col_idx >= len(row):
+                continue
+            shift_val = row[col_idx].strip()
+            if shift_val in SKIP_VALUES:
+                continue
+            if shift_val not in CLINIC_MAP:
+                continue
+            results.append(
+                {
+                    "date": shift_date.strftime("%Y-%m-%d"),
+                    "doctor_name": doctor_name,
+                    "clinic_name": CLINIC_MAP[shift_val],
+                    "start_time": "",
+                    "end_time": "",
+                }
+            )
+    results.sort(key=lambda e: (e["date"], e["doctor_name"]))
+    return results
+
+
+def _bench(label, func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - t0)
+    print(f"{label:<12} {best * 1000:9.2f} ms  ({len(result)}件)")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="シートグリッド解析のベンチマーク")
+    parser.add_argument("--from", dest="from_month", default="2024-07")
+    parser.add_argument("--to", dest="to_month", default="2026-05")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    months = month_range(args.from_month, args.to_month)
+    values = data_fetcher.load_sheet_values(months, offline=True)
+    print(f"対象: {args.from_month}〜{args.to_month}（{len(months)}シート）")
+
+    legacy = _bench(
+        "従来ループ",
+        lambda: [e for ym in months for e in _legacy_parse(values[ym], *ym)],
+        args.repeat,
+    )
+    single = _bench(
+        "1パス解析",
+        lambda: data_fetcher._build_table([data_fetcher.parse_sheet_values(values[ym], *ym) for ym in months]),
+        args.repeat,
+    )
+    print(f"速度比: {legacy / single:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+bench_schedule_images.py — 出勤情報ストーリー画像生成のベンチマーク
+1ヶ月分のシフトについて、全レイヤーを毎回描画する従来の方法と
+固定レイヤーのベース画像をコピーする方法（image_schedule のテンプレート）を比較する。
+
+使用例:
+    python scripts/bench_schedule_images.py --month 2026-03 --source offline
+    python scripts/bench_schedule_images.py --month 2026-03 --save   # PNGエンコードも含める
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import image_schedule  # noqa: E402
+from data_fetcher import fetch_schedule  # noqa: E402
+from data_sources import open_source  # noqa: E402
+
+
+def _bench(label, entries, use_template, save):
+    t0 = time.perf_counter()
+    for entry in entries:
+        img = image_schedule.render_schedule_image(entry, use_template=use_template)
+        if save:
+            img.save(io.BytesIO(), "PNG")
+    elapsed = time.perf_counter() - t0
+    per_image = elapsed / len(entries) * 1000 if entries else 0.0
+    print(f"{label:<12} {elapsed * 1000:9.1f} ms  ({per_image:.2f} ms/枚)")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="出勤情報ストーリー画像生成のベンチマーク")
+    parser.add_argument("--month", default="2026-03")
+    parser.add_argument("--source", default="offline")
+    parser.add_argument("--save", action="store_true", help="PNGエンコード（メモリ上）も計測に含める")
+    args = parser.parse_args()
+
+    entries = list(fetch_schedule(month=args.month, source=open_source(args.source)))
+    print(f"対象: {args.month}（{len(entries)}枚）")
+
+    # フォント読み込み・ベース画像生成を計測から除く
+    image_schedule.render_schedule_image(entries[0] if entries else {})
+
+    scratch = _bench("毎回描画", entries, False, args.save)
+    template = _bench("テンプレート", entries, True, args.save)
+    if template:
+        print(f"速度比: {scratch / template:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
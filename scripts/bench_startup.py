@@ -0,0 +1,93 @@
+"""
+bench_startup.py — generate.py の起動時間ベンチマーク
+生成タイプごとに、generate.py の読み込み + そのタイプが使うモジュールの読み込みまでを
+新しいプロセスで繰り返し計測する（コールドスタートの実時間）。
+あわせて -X importtime の自己時間の合計と、時間のかかったモジュールを表示する。
+
+使用例:
+    python scripts/bench_startup.py
+    python scripts/bench_startup.py --repeat 20 --json bench_startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+TYPES = ["schedule", "calendar", "poem", "ical"]
+
+# (ラベル, 実行するコード)
+CASES = [("python", "pass"), ("generate", "import generate")] + [
+    (name, f"import generate; generate._import_stage_modules([{name!r}])") for name in TYPES
+] + [("all", f"import generate; generate._import_stage_modules({TYPES!r})")]
+
+
+def _wall_times(code, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
+        times.append((time.perf_counter() - t0) * 1000)
+    return times
+
+
+def _import_time(code):
+    """-X importtime の出力から (自己時間の合計ms, モジュール数, 自己時間の上位) を返す。"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, _, name = line[len("import time:") :].split("|")
+        if not self_us.strip().isdigit():
+            continue  # ヘッダ行
+        modules.append((int(self_us) / 1000, name.strip()))
+    modules.sort(reverse=True)
+    return sum(ms for ms, _ in modules), len(modules), modules[:3]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="generate.py の起動時間ベンチマーク")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--json", help="結果をJSONで保存するパス")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'対象':<10} {'中央値':>9} {'最小':>9} {'import合計':>11} {'モジュール':>6}  上位")
+    for label, code in CASES:
+        times = _wall_times(code, args.repeat)
+        import_ms, count, top = _import_time(code)
+        results.append(
+            {
+                "case": label,
+                "wall_median_ms": round(statistics.median(times), 1),
+                "wall_min_ms": round(min(times), 1),
+                "import_self_ms": round(import_ms, 1),
+                "modules": count,
+                "top": [{"module": name, "self_ms": round(ms, 1)} for ms, name in top],
+            }
+        )
+        top_text = ", ".join(f"{name} {ms:.0f}ms" for ms, name in top)
+        print(
+            f"{label:<10} {statistics.median(times):7.1f}ms {min(times):7.1f}ms"
+            f" {import_ms:9.1f}ms {count:6d}  {top_text}"
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "results": results}, f, indent=2)
+        print(f"保存: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+bench_suite.py — 合成データによるベンチマークスイート
+scripts/synthetic_grid.py の合成グリッドを複数の規模で生成し、次の処理を計測する。
+
+- parse: シートグリッドの解析（fetch_schedule の解析部分 = data_fetcher.schedule_from_values）
+- schedule_image: generate_schedule_image（1枚あたり、--images 枚で計測）
+- calendar_image: generate_calendar_image（1ヶ月分あたり）
+- poem_image: generate_poem_image（1枚あたり）
+- ical: generate_ical（全期間1ファイル）
+
+結果はコミットごとに JSON で保存し、--compare で以前の結果と比較できる。
+
+使用例:
+    python scripts/bench_suite.py                         # cache/bench/<コミット>.json に保存
+    python scripts/bench_suite.py --scales small,medium --compare cache/bench/abc1234.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from data_fetcher import schedule_from_values  # noqa: E402
+from ical_generator import generate_ical  # noqa: E402
+from image_calendar import generate_calendar_image  # noqa: E402
+from image_poem import POEM_DEFAULTS, generate_poem_image  # noqa: E402
+from image_schedule import generate_schedule_image  # noqa: E402
+from synthetic_grid import make_grids  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+RESULTS_DIR = os.path.join(ROOT, "cache", "bench")
+
+# 規模 → 合成グリッドのパラメータ
+SCALES = {
+    "small": {"doctors": 10, "clinics": 3, "months": 1, "annotation_density": 0.1},
+    "medium": {"doctors": 30, "clinics": 5, "months": 3, "annotation_density": 0.2},
+    "large": {"doctors": 80, "clinics": 7, "months": 12, "annotation_density": 0.3},
+}
+START_MONTH = "2026-01"
+# 比較時に遅くなったと判定する比率
+REGRESSION_RATIO = 1.10
+
+
+def _best_ms(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_scale(name, params, repeat, images, workdir):
+    """1つの規模を計測し、{処理名: ms} を返す。"""
+    grid_params = {key: value for key, value in params.items() if key != "months"}
+    grids = make_grids(START_MONTH, params["months"], **grid_params)
+    table = schedule_from_values(grids)
+    entries = table.to_dicts(default_start_time="09:00", default_end_time="18:00")
+    months = sorted({entry["date"][:7] for entry in entries})
+
+    metrics = {"parse": _best_ms(lambda: schedule_from_values(grids), repeat)}
+
+    sample = entries[:: max(1, len(entries) // images)][:images]
+    png_path = os.path.join(workdir, f"{name}_schedule.png")
+    metrics["schedule_image"] = _best_ms(
+        lambda: [generate_schedule_image(entry, png_path) for entry in sample], 1
+    ) / max(1, len(sample))
+
+    calendar_path = os.path.join(workdir, f"{name}_calendar.png")
+    metrics["calendar_image"] = _best_ms(
+        lambda: [
+            generate_calendar_image(table.for_month(month), month, calendar_path)
+            for month in months
+        ],
+        1,
+    ) / max(1, len(months))
+
+    poem = POEM_DEFAULTS[0]
+    poem_path = os.path.join(workdir, f"{name}_poem.png")
+    metrics["poem_image"] = _best_ms(
+        lambda: generate_poem_image(poem["text"], poem_path, poem.get("author", "")), repeat
+    )
+
+    ics_path = os.path.join(workdir, f"{name}.ics")
+    metrics["ical"] = _best_ms(lambda: generate_ical(entries, ics_path), repeat)
+
+    return {
+        "scale": name,
+        "params": params,
+        "shifts": len(entries),
+        "ms": {key: round(value, 2) for key, value in metrics.items()},
+    }
+
+
+def _compare(results, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {item["scale"]: item for item in json.load(f)["results"]}
+    print(f"\n比較: {baseline_path}")
+    for item in results:
+        old = baseline.get(item["scale"])
+        if old is None:
+            continue
+        for key, value in item["ms"].items():
+            old_value = old["ms"].get(key)
+            if not old_value:
+                continue
+            ratio = value / old_value
+            mark = "  ← 遅くなっています" if ratio > REGRESSION_RATIO else ""
+            print(f"  {item['scale']:<7} {key:<15} {old_value:9.2f} → {value:9.2f} ms ({ratio:.2f}x){mark}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="合成データによるベンチマークスイート")
+    parser.add_argument("--scales", default=",".join(SCALES), help="計測する規模（カンマ区切り）")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--images", type=int, default=10, help="schedule 画像の計測枚数")
+    parser.add_argument("--json", help="結果の保存先（デフォルト: cache/bench/<コミット>.json）")
+    parser.add_argument("--compare", help="比較する以前の結果JSON")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scales.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCALES]
+    if unknown:
+        parser.error(f"不明な規模です: {', '.join(unknown)}（{' / '.join(SCALES)}）")
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in names:
+            item = run_scale(name, SCALES[name], args.repeat, args.images, workdir)
+            results.append(item)
+            timings = "  ".join(f"{key}={value:.2f}ms" for key, value in item["ms"].items())
+            print(f"{name:<7} {item['shifts']:6d}件  {timings}")
+
+    commit = _git_commit()
+    output = {
+        "commit": commit,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    json_path = args.json or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(json_path)), exist_ok=True)
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(output, f, ensure_ascii=False, indent=2)
+    print(f"保存: {json_path}")
+
+    if args.compare:
+        _compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,44 @@
 """
 fetch_sheets.py — Google Sheets API疎通確認スクリプト
 スプレッドシートのシート名・ヘッダー・サンプルデータを取得してファイルに出力する
+
+--full 指定時は全シートの全セル値を並行取得し、バージョン付きアーカイブとして保存する。
+アーカイブは `python generate.py --source json:cache/archive/latest.json` でそのまま読み込める。
 """
 
+import argparse
 import json
 import os
+import shutil
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 
-import gspread
-from google.oauth2.service_account import Credentials
+from gspread.utils import absolute_range_name, fill_gaps
 
-SPREADSHEET_ID = "1vuP1qxZX9sXifzbP0Zk40zfFf7eYbFqk727V4wWU3lU"
-CREDENTIALS_PATH = os.path.join(os.path.dirname(__file__), "..", "secrets", "snappy-flash-488807-h4-88e00a722344.json")
-OUTPUT_PATH = os.path.join(os.path.dirname(__file__), "..", "docs", "spreadsheet_structure.json")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
-SCOPES = [
-    "https://www.googleapis.com/auth/spreadsheets.readonly",
-    "https://www.googleapis.com/auth/drive.readonly",
-]
+from data_fetcher import CACHE_DIR, SPREADSHEET_ID, get_client, get_revision  # noqa: E402
+
+OUTPUT_PATH = os.path.join(os.path.dirname(__file__), "..", "docs", "spreadsheet_structure.json")
+ARCHIVE_DIR = os.path.join(CACHE_DIR, "archive")
 
 SAMPLE_ROWS = 3
 
+# 全シート取得時の1リクエストあたりのシート数と同時リクエスト数
+# （読み取りクォータ: 1ユーザーあたり60リクエスト/分 に十分収まる）
+BATCH_SIZE = 10
+MAX_WORKERS = 4
+
 
 def fetch_spreadsheet_structure():
-    creds_path = os.path.abspath(CREDENTIALS_PATH)
-    if not os.path.exists(creds_path):
-        print(f"ERROR: 認証JSONが見つかりません: {creds_path}", file=sys.stderr)
+    try:
+        client = get_client()
+    except FileNotFoundError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
         sys.exit(1)
 
-    creds = Credentials.from_service_account_file(creds_path, scopes=SCOPES)
-    client = gspread.authorize(creds)
-
     print(f"スプレッドシートID: {SPREADSHEET_ID} に接続中...")
     spreadsheet = client.open_by_key(SPREADSHEET_ID)
     print(f"タイトル: {spreadsheet.title}")
@@ -73,5 +81,83 @@ def fetch_spreadsheet_structure():
     return result
 
 
+def export_all_sheets(batch_size=BATCH_SIZE, max_workers=MAX_WORKERS):
+    """全シートの全セル値を取得し、バージョン付きアーカイブに保存する。
+
+    シートを batch_size 件ずつの values.batchGet にまとめ、最大 max_workers 本を並行実行する。
+    """
+    try:
+        client = get_client()
+    except FileNotFoundError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    started = time.perf_counter()
+    revision = get_revision(client)
+    params = {
+        "fields": "properties.title,"
+        "sheets.properties(title,gridProperties(rowCount,columnCount))"
+    }
+    metadata = client.http_client.fetch_sheet_metadata(SPREADSHEET_ID, params=params)
+    sheets = [sheet["properties"] for sheet in metadata.get("sheets", [])]
+    print(f"リビジョン: {revision} / シート数: {len(sheets)}")
+
+    titles = [sheet["title"] for sheet in sheets]
+    batches = [titles[i : i + batch_size] for i in range(0, len(titles), batch_size)]
+
+    def _fetch_batch(batch):
+        response = client.http_client.values_batch_get(
+            SPREADSHEET_ID, [absolute_range_name(title) for title in batch]
+        )
+        return [fill_gaps(vr.get("values", [])) for vr in response.get("valueRanges", [])]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        values = [grid for grids in pool.map(_fetch_batch, batches) for grid in grids]
+
+    result = {
+        "spreadsheet_id": SPREADSHEET_ID,
+        "title": metadata.get("properties", {}).get("title", ""),
+        "revision": revision,
+        "fetched_at": datetime.now().isoformat(timespec="seconds"),
+        "sheets": [],
+    }
+    for sheet, all_values in zip(sheets, values):
+        grid = sheet.get("gridProperties", {})
+        result["sheets"].append(
+            {
+                "title": sheet["title"],
+                "row_count": grid.get("rowCount", 0),
+                "col_count": grid.get("columnCount", 0),
+                "headers": all_values[0] if all_values else [],
+                "sample_rows": all_values[1 : 1 + SAMPLE_ROWS],
+                "values": all_values,
+            }
+        )
+
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+    archive_path = os.path.join(ARCHIVE_DIR, f"sheets_{stamp}_r{revision}.json")
+    with open(archive_path, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False)
+    shutil.copyfile(archive_path, os.path.join(ARCHIVE_DIR, "latest.json"))
+
+    elapsed = time.perf_counter() - started
+    print(f"アーカイブを保存: {archive_path} ({len(batches)}リクエスト, {elapsed:.1f}秒)")
+    return archive_path
+
+
 if __name__ == "__main__":
-    fetch_spreadsheet_structure()
+    parser = argparse.ArgumentParser(description="Google Sheets の構造確認・全シートエクスポート")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="全シートの全セル値を並行取得して cache/archive/ に保存する",
+    )
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    args = parser.parse_args()
+
+    if args.full:
+        export_all_sheets(batch_size=args.batch_size, max_workers=args.workers)
+    else:
+        fetch_spreadsheet_structure()
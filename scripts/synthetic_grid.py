@@ -0,0 +1,147 @@
+"""
+synthetic_grid.py — ベンチマーク用の合成シートグリッド生成
+実シートと同じレイアウト（タイトル行・空行・日付行・曜日行・グループ付き医師行・院別Dr人数の集計行）の
+グリッドを、医師数・クリニック数・月数・勤務時間注記の割合を指定して生成する。
+
+scripts/fetch_sheets.py --full と同じ形式の JSON を書き出せるため、
+generate.py --source json:<パス> でそのまま使える。
+
+使用例:
+    python scripts/synthetic_grid.py --doctors 40 --clinics 5 --from 2026-01 --months 6 -o synthetic.json
+    python generate.py --type ical --from 2026-01 --to 2026-06 --source json:synthetic.json
+"""
+
+import argparse
+import calendar
+import json
+import os
+import random
+import sys
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from data_fetcher import CLINIC_MAP, SUMMARY_SUFFIX, month_range  # noqa: E402
+
+WEEKDAYS_JP = "月火水木金土日"
+OFF_VALUES = ["休", "希", "有", ""]
+# 1グループあたりの医師数
+GROUP_SIZE = 6
+# 勤務時間注記の書式（実シートで使われている表記ゆれ）
+ANNOTATIONS = ["\n_~16:30", "_10:00~", "\n9:30〜18:00", " ~17:00"]
+
+
+def make_grid(
+    year: int,
+    month: int,
+    doctors: int = 20,
+    clinics: int = 5,
+    annotation_density: float = 0.1,
+    work_ratio: float = 0.6,
+    seed: int = 0,
+) -> List[List[str]]:
+    """1ヶ月分のシートグリッドを生成する。
+
+    Args:
+        doctors: 医師行の数
+        clinics: 使うクリニック数（CLINIC_MAP の先頭から、最大 len(CLINIC_MAP)）
+        annotation_density: 医師名に勤務時間注記を付ける割合
+        work_ratio: 各セルが勤務（クリニックコード）になる割合
+        seed: 乱数シード（同じ引数なら同じグリッド）
+    """
+    rnd = random.Random(f"{seed}-{year}-{month}")
+    codes = list(CLINIC_MAP)[: max(1, min(clinics, len(CLINIC_MAP)))]
+    days = calendar.monthrange(year, month)[1]
+    width = 2 + 31 + 3
+
+    def _row() -> List[str]:
+        return [""] * width
+
+    title = _row()
+    title[2] = f"{year}年{month}月　Drシフト"
+    date_row = _row()
+    weekday_row = _row()
+    for day in range(1, days + 1):
+        date_row[1 + day] = str(day)
+        weekday_row[1 + day] = WEEKDAYS_JP[calendar.weekday(year, month, day)]
+    rows = [title, _row(), date_row, weekday_row]
+
+    counts: Dict[Tuple[int, str], int] = {}
+    for index in range(doctors):
+        row = _row()
+        if index % GROUP_SIZE == 0:
+            row[0] = f"グループ{index // GROUP_SIZE + 1}"
+        row[1] = f"医師{index + 1:03d}Dr"
+        if rnd.random() < annotation_density:
+            row[1] += rnd.choice(ANNOTATIONS)
+        for day in range(1, days + 1):
+            if rnd.random() < work_ratio:
+                code = rnd.choice(codes)
+                counts[(day, code)] = counts.get((day, code), 0) + 1
+            else:
+                code = rnd.choice(OFF_VALUES)
+            row[1 + day] = code
+        row[2 + 31] = str(sum(1 for day in range(1, days + 1) if row[1 + day] in codes))
+        rows.append(row)
+
+    rows.append(_row())
+    for code in codes:
+        row = _row()
+        row[1] = f"{CLINIC_MAP[code]}{SUMMARY_SUFFIX}"
+        for day in range(1, days + 1):
+            row[1 + day] = str(counts.get((day, code), 0))
+        rows.append(row)
+    return rows
+
+
+def make_grids(
+    start_month: str, months: int, **kwargs
+) -> Dict[Tuple[int, int], List[List[str]]]:
+    """start_month から months ヶ月分の (year, month) → グリッド を生成する。"""
+    year, month = map(int, start_month.split("-"))
+    end_index = year * 12 + month - 1 + months - 1
+    end_month = f"{end_index // 12:04d}-{end_index % 12 + 1:02d}"
+    return {ym: make_grid(*ym, **kwargs) for ym in month_range(start_month, end_month)}
+
+
+def to_archive(grids: Dict[Tuple[int, int], List[List[str]]], revision: str = "synthetic") -> Dict:
+    """scripts/fetch_sheets.py --full と同じ形式（新しい月が先頭のタブ順）の dict にする。"""
+    sheets = []
+    for (year, month), values in sorted(grids.items(), reverse=True):
+        sheets.append(
+            {
+                "title": f"{year}.{month}月",
+                "row_count": len(values),
+                "col_count": len(values[0]) if values else 0,
+                "values": values,
+            }
+        )
+    return {"title": "synthetic", "revision": revision, "sheets": sheets}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ベンチマーク用の合成シートグリッドを生成する")
+    parser.add_argument("--doctors", type=int, default=20)
+    parser.add_argument("--clinics", type=int, default=5)
+    parser.add_argument("--from", dest="from_month", default="2026-01")
+    parser.add_argument("--months", type=int, default=1)
+    parser.add_argument("--annotation-density", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default="synthetic.json")
+    args = parser.parse_args()
+
+    grids = make_grids(
+        args.from_month,
+        args.months,
+        doctors=args.doctors,
+        clinics=args.clinics,
+        annotation_density=args.annotation_density,
+        seed=args.seed,
+    )
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(to_archive(grids), f, ensure_ascii=False)
+    print(f"生成: {args.output}（{len(grids)}シート）")
+
+
+if __name__ == "__main__":
+    main()
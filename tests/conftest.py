@@ -0,0 +1,9 @@
+"""
+conftest.py — テスト共通設定
+リポジトリ直下のモジュール（data_fetcher・request_scheduler 等）を import できるようにする。
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
@@ -0,0 +1,247 @@
+"""
+test_request_scheduler.py — request_scheduler のテスト
+時計・sleep を差し替えて実時間を待たずに、トークンバケットの待機時間、
+429・5xx の再試行（Retry-After の尊重）、同一キーのコアレッシングを確認する。
+HTTP はローカルの http.server で用意した偽サーバに対して実際に送る。
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from request_scheduler import RequestScheduler, TokenBucket
+
+
+class FakeClock:
+    """sleep() で時刻が進む時計。待機した秒数を sleeps に記録する。"""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps = []
+
+    def clock(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeSheetsServer:
+    """パスごとに用意した (ステータス, ヘッダ, 本文) を順に返す偽サーバ。
+
+    用意した応答を使い切った後は最後の応答を返し続ける。hits にパスごとの受信回数を数える。
+    """
+
+    def __init__(self) -> None:
+        self.responses = {}
+        self.hits = {}
+        self.lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                with fake.lock:
+                    fake.hits[self.path] = fake.hits.get(self.path, 0) + 1
+                    queue = fake.responses[self.path]
+                    status, headers, body = queue.pop(0) if len(queue) > 1 else queue[0]
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        self.thread = threading.Thread(
+            target=self.httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self.thread.start()
+
+    def respond(self, path, *responses) -> None:
+        self.responses[path] = list(responses)
+
+    def get(self, path) -> bytes:
+        response = requests.get(self.url + path, timeout=5)
+        response.raise_for_status()
+        return response.content
+
+    def close(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    fake = FakeSheetsServer()
+    yield fake
+    fake.close()
+
+
+@pytest.fixture
+def fake_clock():
+    return FakeClock()
+
+
+def _scheduler(fake_clock, **kwargs) -> RequestScheduler:
+    return RequestScheduler(clock=fake_clock.clock, sleep=fake_clock.sleep, **kwargs)
+
+
+def _wait_until_coalesced(scheduler: RequestScheduler, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not scheduler.stats["coalesced"]:
+        assert time.monotonic() < deadline, "コアレッシングされませんでした"
+        time.sleep(0.01)
+
+
+def test_token_bucket_allows_burst_then_waits_for_refill(fake_clock):
+    bucket = TokenBucket(2, 0.5, fake_clock.clock, fake_clock.sleep)
+
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == 0.0
+    # 空になったら1トークン分（1 / 0.5 = 2秒）待つ
+    assert bucket.acquire() == pytest.approx(2.0)
+    assert fake_clock.now == pytest.approx(2.0)
+
+
+def test_token_bucket_refills_up_to_capacity(fake_clock):
+    bucket = TokenBucket(2, 1.0, fake_clock.clock, fake_clock.sleep)
+    bucket.acquire()
+    bucket.acquire()
+
+    # 長時間空いても容量（2）までしか貯まらない
+    fake_clock.now += 100
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, pytest.approx(1.0)]
+
+
+def test_scheduler_throttles_to_quota(fake_clock):
+    # 60回/分・バースト10 → 11回目以降は 1 / (50/60) = 1.2秒ごと
+    scheduler = _scheduler(fake_clock, quota_per_minute=60, burst=10)
+    for _ in range(12):
+        scheduler.execute(lambda: None)
+
+    assert fake_clock.sleeps == [pytest.approx(1.2), pytest.approx(1.2)]
+    assert scheduler.stats["requests"] == 12
+    assert scheduler.stats["throttled_seconds"] == pytest.approx(2.4)
+
+
+def test_retries_429_and_5xx_honouring_retry_after(server, fake_clock):
+    server.respond(
+        "/values",
+        (429, {"Retry-After": "7"}, b"quota"),
+        (503, {}, b"unavailable"),
+        (200, {}, b"ok"),
+    )
+    scheduler = _scheduler(fake_clock, backoff_base=1.0)
+
+    assert scheduler.execute(lambda: server.get("/values")) == b"ok"
+    assert server.hits["/values"] == 3
+    # 429 は Retry-After（7秒）以上、503 はバックオフ上限（1 * 2**1 秒）以内で待つ
+    first, second = fake_clock.sleeps
+    assert first == pytest.approx(7.0)
+    assert 0.0 <= second <= 2.0
+    assert scheduler.stats["requests"] == 3
+    assert scheduler.stats["retries"] == 2
+    assert scheduler.stats["failures"] == 0
+
+
+def test_gives_up_after_max_retries(server, fake_clock):
+    server.respond("/values", (500, {}, b"error"))
+    scheduler = _scheduler(fake_clock, max_retries=2)
+
+    with pytest.raises(requests.HTTPError):
+        scheduler.execute(lambda: server.get("/values"))
+    assert server.hits["/values"] == 3
+    assert scheduler.stats["retries"] == 2
+    assert scheduler.stats["failures"] == 1
+
+
+def test_does_not_retry_client_errors(server, fake_clock):
+    server.respond("/values", (404, {}, b"not found"))
+    scheduler = _scheduler(fake_clock)
+
+    with pytest.raises(requests.HTTPError):
+        scheduler.execute(lambda: server.get("/values"))
+    assert server.hits["/values"] == 1
+    assert fake_clock.sleeps == []
+    assert scheduler.stats["failures"] == 1
+
+
+def test_coalesces_concurrent_requests_with_same_key(server, fake_clock):
+    server.respond("/values", (200, {}, b"shared"))
+    server.respond("/other", (200, {}, b"other"))
+    scheduler = _scheduler(fake_clock)
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_get():
+        started.set()
+        assert release.wait(5)
+        return server.get("/values")
+
+    results = []
+    owner = threading.Thread(
+        target=lambda: results.append(scheduler.execute(slow_get, key="values"))
+    )
+    owner.start()
+    assert started.wait(5)
+
+    waiter = threading.Thread(
+        target=lambda: results.append(
+            scheduler.execute(lambda: server.get("/values"), key="values")
+        )
+    )
+    waiter.start()
+    # 2件目が実行中のリクエストに相乗りしてから1件目を完了させる
+    _wait_until_coalesced(scheduler)
+    # キーが異なるリクエストは相乗りしない
+    assert scheduler.execute(lambda: server.get("/other"), key="other") == b"other"
+    release.set()
+    owner.join(5)
+    waiter.join(5)
+
+    assert results == [b"shared", b"shared"]
+    assert server.hits == {"/values": 1, "/other": 1}
+    assert scheduler.stats["coalesced"] == 1
+    assert scheduler.stats["requests"] == 2
+
+
+def test_coalesced_requests_share_the_error(fake_clock):
+    scheduler = _scheduler(fake_clock)
+    started = threading.Event()
+    release = threading.Event()
+
+    def failing():
+        started.set()
+        assert release.wait(5)
+        raise ValueError("bad request")
+
+    errors = []
+
+    def run():
+        try:
+            scheduler.execute(failing, key="values")
+        except ValueError as e:
+            errors.append(e)
+
+    owner = threading.Thread(target=run)
+    owner.start()
+    assert started.wait(5)
+    waiter = threading.Thread(target=run)
+    waiter.start()
+    _wait_until_coalesced(scheduler)
+    release.set()
+    owner.join(5)
+    waiter.join(5)
+
+    assert len(errors) == 2 and errors[0] is errors[1]
+    assert scheduler.stats["requests"] == 1
+    # 完了後は同じキーでも新しく送信する
+    assert scheduler.execute(lambda: "fresh", key="values") == "fresh"
@@ -0,0 +1,112 @@
+"""
+test_watcher.py — watcher（--watch）のテスト
+記録したリビジョンを ReplaySource で再生し、sleep を差し替えて待たずに
+watch() の呼び出し・diff_cells のセル差分・changed_shifts のシフト差分を確認する。
+"""
+
+import copy
+import json
+
+from data_sources import ReplaySource
+from watcher import changed_shifts, diff_cells, watch
+
+MARCH = (2026, 3)
+
+
+def _grid(doctors):
+    """2026年3月1〜3日の最小シート（タイトル行・空行・日付行・曜日行・医師行）。"""
+    return [
+        ["2026年3月"],
+        [],
+        ["", "", "1", "2", "3"],
+        ["", "", "日", "月", "火"],
+        *[["A", name, *cells] for name, cells in doctors],
+    ]
+
+
+BASE = _grid([("守屋Dr", ["銀座", "休", "大阪"]), ("田中Dr", ["", "福岡", "福岡"])])
+
+
+def _write_recordings(directory, revisions):
+    """(リビジョン, グリッド) を fetch_sheets.py --full のアーカイブ形式で順に書き出す。"""
+    for i, (revision, values) in enumerate(revisions):
+        archive = {
+            "revision": revision,
+            "sheets": [{"title": "2026.3月", "values": values}],
+        }
+        with open(directory / f"{i:02d}.json", "w", encoding="utf-8") as f:
+            json.dump(archive, f, ensure_ascii=False)
+
+
+class CountingReplaySource(ReplaySource):
+    """load_values() の呼び出し回数を数える ReplaySource。"""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.loads = 0
+
+    def load_values(self, months, missing_ok=False):
+        self.loads += 1
+        return super().load_values(months, missing_ok)
+
+
+def test_diff_cells_reports_changed_and_ragged_cells():
+    new = copy.deepcopy(BASE)
+    new[4][3] = "新宿"
+    new[5].append("銀座")
+
+    assert diff_cells(BASE, new) == [(4, 3), (5, 5)]
+    assert diff_cells(BASE, copy.deepcopy(BASE)) == []
+    # 行が増減した場合は、なくなった側を空セルとして比較する（空だったセルは差分なし）
+    assert diff_cells(BASE, BASE[:5]) == [(5, 0), (5, 1), (5, 3), (5, 4)]
+
+
+def test_changed_shifts_includes_time_annotation_changes():
+    new = copy.deepcopy(BASE)
+    new[4][3] = "新宿"  # 休 → 新宿（追加）
+    new[5][1] = "田中Dr\n_~16:30"  # 勤務時間注記（全勤務日が変わる）
+
+    assert changed_shifts(BASE, new, *MARCH) == {
+        ("2026-03-02", "守屋Dr"),
+        ("2026-03-02", "田中Dr"),
+        ("2026-03-03", "田中Dr"),
+    }
+    assert changed_shifts(BASE, copy.deepcopy(BASE), *MARCH) == set()
+
+
+def test_watch_replays_revisions_and_reports_only_changes(tmp_path):
+    edited = copy.deepcopy(BASE)
+    edited[4][2] = "池袋"  # 銀座 → 池袋
+    _write_recordings(
+        tmp_path,
+        [
+            ("r1", BASE),
+            ("r1", BASE),  # リビジョンが同じ → 読み直さない
+            ("r2", edited),
+            ("r3", copy.deepcopy(edited)),  # リビジョンは変わったがセルは同じ → 通知しない
+        ],
+    )
+    source = CountingReplaySource(str(tmp_path))
+    calls = []
+    sleeps = []
+
+    values = watch(
+        source,
+        [MARCH],
+        lambda values, changes: calls.append((values, changes)),
+        interval=30,
+        sleep=sleeps.append,
+    )
+
+    # 初回 + r2 + r3 の3回だけ読み込み、通知は初回と r2 の2回
+    assert source.loads == 3
+    assert len(calls) == 2
+    assert calls[0][1] is None
+    latest, changes = calls[1]
+    assert latest[MARCH] == edited
+    assert list(changes) == [MARCH]
+    assert changes[MARCH].cells == [(4, 2)]
+    assert changes[MARCH].shifts == {("2026-03-01", "守屋Dr")}
+    # 2件目以降の記録ごとに1回 + 再生終了（revision() が None）を検出するまでの1回待つ
+    assert sleeps == [30, 30, 30, 30]
+    assert values[MARCH] == edited
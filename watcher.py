@@ -0,0 +1,90 @@
+"""
+watcher.py — スプレッドシートの変更監視（generate.py --watch）
+
+データソースのリビジョンを一定間隔でポーリングし、変わった場合だけシートを読み直す。
+前回のグリッドとセル単位で比較し、変更のあった月・日付・医師を on_change に渡す。
+"""
+
+import time
+from datetime import date
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from data_fetcher import parse_sheet_values
+
+Grid = List[List[str]]
+YearMonth = Tuple[int, int]
+
+
+class SheetChange(NamedTuple):
+    # 値が変わったセル (行, 列)（0始まり）
+    cells: List[Tuple[int, int]]
+    # 追加・削除・変更されたシフトの (日付 "YYYY-MM-DD", 医師名)
+    shifts: Set[Tuple[str, str]]
+
+
+def diff_cells(old: Grid, new: Grid) -> List[Tuple[int, int]]:
+    """2つのグリッドをセル単位で比較し、値が異なるセルの (行, 列) を返す。"""
+    changed = []
+    for row_idx in range(max(len(old), len(new))):
+        old_row = old[row_idx] if row_idx < len(old) else []
+        new_row = new[row_idx] if row_idx < len(new) else []
+        if old_row == new_row:
+            continue
+        for col_idx in range(max(len(old_row), len(new_row))):
+            old_cell = old_row[col_idx] if col_idx < len(old_row) else ""
+            new_cell = new_row[col_idx] if col_idx < len(new_row) else ""
+            if old_cell != new_cell:
+                changed.append((row_idx, col_idx))
+    return changed
+
+
+def changed_shifts(old: Grid, new: Grid, year: int, month: int) -> Set[Tuple[str, str]]:
+    """変更前後のグリッドを解析し、差分のあるシフトの (日付, 医師名) を返す。
+
+    医師名列の勤務時間注記や日付行の変更も、影響するシフトとして検出される。
+    """
+    old_shifts = set(parse_sheet_values(old, year, month).shifts)
+    new_shifts = set(parse_sheet_values(new, year, month).shifts)
+    return {
+        (date.fromordinal(ordinal).isoformat(), doctor_name)
+        for ordinal, doctor_name, _, _, _ in old_shifts ^ new_shifts
+    }
+
+
+def watch(
+    source,
+    months: List[YearMonth],
+    on_change: Callable[[Dict[YearMonth, Grid], Optional[Dict[YearMonth, SheetChange]]], None],
+    interval: float = 60.0,
+    sleep: Callable[[float], None] = time.sleep,
+    missing_ok: bool = False,
+) -> Dict[YearMonth, Grid]:
+    """source（data_sources.DataSource）を監視し、変更があるたびに on_change を呼ぶ。
+
+    on_change(values, changes) の values は全対象月の最新グリッド、
+    changes はセルが変わった月だけの SheetChange（初回読み込み時は None）。
+    source.revision() が None を返したら（リプレイ終了など）最新グリッドを返して終わる。
+    missing_ok=True ならシートがまだない月は空のグリッドとして扱う（シートが追加されると変更として検出）。
+    """
+    revision = source.revision()
+    values = source.load_values(months, missing_ok=missing_ok)
+    on_change(values, None)
+
+    while revision is not None:
+        sleep(interval)
+        new_revision = source.revision()
+        if new_revision is None:
+            break
+        if new_revision and new_revision == revision:
+            continue
+
+        new_values = source.load_values(months, missing_ok=missing_ok)
+        changes = {}
+        for ym in months:
+            cells = diff_cells(values[ym], new_values[ym])
+            if cells:
+                changes[ym] = SheetChange(cells, changed_shifts(values[ym], new_values[ym], *ym))
+        revision, values = new_revision, new_values
+        if changes:
+            on_change(values, changes)
+    return values